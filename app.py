@@ -1,9 +1,15 @@
+import asyncio
 import os
 import json
 import tempfile
 import random
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date, time, timedelta
 import io
+import click
+import orjson
 from xhtml2pdf import pisa
 
 import logging
@@ -23,6 +29,7 @@ from flask import (
     abort,
     make_response,
 )
+from flask.cli import AppGroup
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
@@ -35,13 +42,32 @@ from sqlalchemy import and_
 
 
 from utils.evaluation import (
+    TRANSCRIBE_CONCURRENCY,
+    WARMUP_ENV,
     evaluate_answer,
     transcribe_audio_whisper,
+    transcribe_batch,
     gpt_evaluate_answer,
+    warmup,
+)
+from utils.openai_client import get_client
+from utils.prep_generator import (
+    PREP_JOBS_ENV,
+    PREP_PREFETCH_ENV,
+    collect_prep_report_batch,
+    generate_prep_report,
+    generate_prep_reports_batch,
+    generate_prep_reports_bulk,
+    submit_prep_report_batch,
+)
+from utils.batch_api import BATCH_API_POLL_SECONDS
+from utils.resume_review_generator import (
+    DEFAULT_RESUME_CONCURRENCY,
+    collect_resume_report_batch,
+    generate_resume_report,
+    generate_resume_reports_bulk,
+    submit_resume_report_batch,
 )
-from utils.prep_generator import generate_prep_report
-from utils.resume_review_generator import generate_resume_report
-from openai import OpenAI
 from werkzeug.exceptions import HTTPException
 
 # ---------------------------------------------------------------------------
@@ -70,8 +96,12 @@ db = SQLAlchemy(
     },
 )
 
-# OpenAI client (uses OPENAI_API_KEY env var)
-client = OpenAI()
+# Worker threads for overlapping independent OpenAI calls within one request
+llm_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm")
+
+# Optional: pre-open the OpenAI connection so the first request is not cold
+if os.environ.get(WARMUP_ENV, "").strip() == "1":
+    warmup()
 
 # ---------------------------------------------------------------------------
 # Global error handler
@@ -1119,6 +1149,93 @@ def job_detail(job_id: int):
 from flask import redirect, render_template, request, url_for
 
 
+def _resolve_custom_prep_resume(current_user):
+    """
+    Resume text for a custom prep POST: pasted text, else an uploaded PDF,
+    else the user's latest saved resume. Returns (resume_text, error).
+    """
+    error = None
+
+    # 1) Pasted resume text (support multiple possible field names)
+    resume_text = (
+        (request.form.get("resume_text") or "").strip()
+        or (request.form.get("resume") or "").strip()
+        or (request.form.get("resumeContent") or "").strip()
+    )
+
+    # 2) Optional PDF upload on custom prep page (same extraction as resume_check)
+    resume_file = request.files.get("resume_file")
+    if (not resume_text) and resume_file and resume_file.filename:
+        filename = secure_filename(resume_file.filename)
+        if not filename.lower().endswith(".pdf"):
+            error = "Please upload a PDF file."
+        else:
+            temp_path = None
+            try:
+                with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
+                    temp_path = tmp.name
+                    resume_file.save(temp_path)
+
+                try:
+                    from PyPDF2 import PdfReader
+
+                    reader = PdfReader(temp_path)
+                    pages_text = []
+                    for page in reader.pages:
+                        try:
+                            pages_text.append(page.extract_text() or "")
+                        except Exception:
+                            continue
+                    resume_text = "\n".join(pages_text).strip()
+                except Exception as e:
+                    resume_text = ""
+                    error = (
+                        "Could not read the PDF text. Please paste your resume text instead. "
+                        f"({str(e)})"
+                    )
+            finally:
+                if temp_path and os.path.exists(temp_path):
+                    try:
+                        os.remove(temp_path)
+                    except Exception:
+                        pass
+
+    # 3) If still empty, use the latest saved resume from resume_reports
+    if (not error) and (not resume_text) and current_user:
+        latest_resume = (
+            ResumeReport.query
+            .filter_by(user_id=current_user.id)
+            .order_by(ResumeReport.created_at.desc())
+            .first()
+        )
+        if latest_resume and (latest_resume.resume_text or "").strip():
+            resume_text = (latest_resume.resume_text or "").strip()
+            logger.info("custom_prep using latest saved resume_report id=%s chars=%s",
+                        latest_resume.id, len(resume_text))
+        else:
+            logger.info("custom_prep no saved resume found for user_id=%s", current_user.id)
+
+    return resume_text, error
+
+
+def _save_prep_report(user_id, job_title, company_name, job_description, resume_text, report):
+    prep = PrepReport(
+        user_id=user_id,
+        job_title=job_title,
+        company_name=company_name,
+        job_description=job_description,
+        resume_text=resume_text,
+        report_json=report,
+    )
+    db.session.add(prep)
+    db.session.commit()
+
+    if user_id:
+        prune_user_records(PrepReport, user_id, keep=20)
+
+    return prep
+
+
 @app.route("/custom_prep", methods=["GET", "POST"])
 def custom_prep():
     report = None
@@ -1130,65 +1247,7 @@ def custom_prep():
         job_description = request.form.get("job_description", "").strip() or None
 
         current_user = get_current_user()
-
-        # 1) Pasted resume text (support multiple possible field names)
-        resume_text = (
-            (request.form.get("resume_text") or "").strip()
-            or (request.form.get("resume") or "").strip()
-            or (request.form.get("resumeContent") or "").strip()
-        )
-
-        # 2) Optional PDF upload on custom prep page (same extraction as resume_check)
-        resume_file = request.files.get("resume_file")
-        if (not resume_text) and resume_file and resume_file.filename:
-            filename = secure_filename(resume_file.filename)
-            if not filename.lower().endswith(".pdf"):
-                error = "Please upload a PDF file."
-            else:
-                temp_path = None
-                try:
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                        temp_path = tmp.name
-                        resume_file.save(temp_path)
-
-                    try:
-                        from PyPDF2 import PdfReader
-
-                        reader = PdfReader(temp_path)
-                        pages_text = []
-                        for page in reader.pages:
-                            try:
-                                pages_text.append(page.extract_text() or "")
-                            except Exception:
-                                continue
-                        resume_text = "\n".join(pages_text).strip()
-                    except Exception as e:
-                        resume_text = ""
-                        error = (
-                            "Could not read the PDF text. Please paste your resume text instead. "
-                            f"({str(e)})"
-                        )
-                finally:
-                    if temp_path and os.path.exists(temp_path):
-                        try:
-                            os.remove(temp_path)
-                        except Exception:
-                            pass
-
-        # 3) If still empty, use the latest saved resume from resume_reports
-        if (not error) and (not resume_text) and current_user:
-            latest_resume = (
-                ResumeReport.query
-                .filter_by(user_id=current_user.id)
-                .order_by(ResumeReport.created_at.desc())
-                .first()
-            )
-            if latest_resume and (latest_resume.resume_text or "").strip():
-                resume_text = (latest_resume.resume_text or "").strip()
-                logger.info("custom_prep using latest saved resume_report id=%s chars=%s",
-                            latest_resume.id, len(resume_text))
-            else:
-                logger.info("custom_prep no saved resume found for user_id=%s", current_user.id)
+        resume_text, error = _resolve_custom_prep_resume(current_user)
 
         logger.info("custom_prep POST form keys: %s", list(request.form.keys()))
         logger.info("custom_prep POST file keys: %s", list(request.files.keys()))
@@ -1210,20 +1269,14 @@ def custom_prep():
                 error = report["error"]
             else:
                 try:
-                    prep = PrepReport(
-                        user_id=current_user.id if current_user else None,
-                        job_title=job_title,
-                        company_name=company_name,
-                        job_description=job_description,
-                        resume_text=resume_text,
-                        report_json=report,
+                    prep = _save_prep_report(
+                        current_user.id if current_user else None,
+                        job_title,
+                        company_name,
+                        job_description,
+                        resume_text,
+                        report,
                     )
-                    db.session.add(prep)
-                    db.session.commit()
-
-                    if current_user:
-                        prune_user_records(PrepReport, current_user.id, keep=20)
-
                     return redirect(url_for("view_saved_prep_report", report_id=prep.id))
 
                 except Exception:
@@ -1234,9 +1287,162 @@ def custom_prep():
         "custom_prep.html",
         report=report,
         error=error,
+        prep_jobs_enabled=_prep_jobs_enabled(),
     )
 
 
+# Background prep jobs (NEXTSTEP_PREP_JOBS=1): the custom prep page POSTs
+# here, gets a job id at once and polls for the saved report, so a 5-15s
+# generation does not hold a worker. Jobs live in this process's memory and
+# a poll that lands on another process gets a 404, so only enable this where
+# a user's requests reach one process (a single gunicorn worker with
+# --threads, or sticky sessions); otherwise the page uses the blocking POST
+# above. Each owner (user, or browser session when logged out) may have at
+# most MAX_PREP_JOBS_PER_OWNER jobs running, and MAX_PREP_JOBS jobs are
+# tracked in total, so nobody can queue unbounded OpenAI calls.
+prep_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="prep")
+_prep_jobs = {}  # job_id -> (owner, Future resolving to a PrepReport id)
+_prep_jobs_lock = threading.Lock()
+MAX_PREP_JOBS = 256
+MAX_PREP_JOBS_PER_OWNER = 2
+
+
+def _prep_jobs_enabled():
+    return os.environ.get(PREP_JOBS_ENV, "").strip() == "1"
+
+
+def _prep_job_owner(current_user):
+    if current_user:
+        return ("user", current_user.id)
+    # Keyed on the session rather than the address, so clients behind one
+    # NAT or proxy do not share a job limit or see each other's jobs
+    return ("anon", session.setdefault("prep_job_owner", uuid.uuid4().hex))
+
+
+def _run_prep_job(user_id, job_title, company_name, job_description, resume_text):
+    report = generate_prep_report(
+        job_title=job_title,
+        company_name=company_name,
+        job_description=job_description,
+        resume_text=resume_text,
+        use_gpt=True,
+    )
+    if report.get("error"):
+        raise ValueError(report["error"])
+
+    with app.app_context():
+        try:
+            return _save_prep_report(user_id, job_title, company_name, job_description, resume_text, report).id
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+# Speculative prep (NEXTSTEP_PREP_PREFETCH=1): after a resume check, generate
+# the role-focused prep report in the background so that a follow-up custom
+# prep for the same role and saved resume is an instant cache hit. Costs a
+# completion for users who never ask for it, hence opt-in. At most one
+# prefetch per user is in flight.
+prefetch_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prep-prefetch")
+_prefetching = set()  # user ids with a prefetch in flight
+_prefetching_lock = threading.Lock()
+
+
+def _prefetch_prep_report(user_id, job_title, resume_text):
+    if os.environ.get(PREP_PREFETCH_ENV, "").strip() != "1" or not job_title:
+        return
+    with _prefetching_lock:
+        if user_id in _prefetching:
+            return
+        _prefetching.add(user_id)
+
+    def run():
+        try:
+            # Same arguments custom_prep passes when it falls back to the
+            # latest saved resume, so the cache key matches
+            generate_prep_report(job_title=job_title, company_name=None, job_description=None,
+                                 resume_text=resume_text, use_gpt=True)
+        except Exception:
+            logger.exception("Prep prefetch failed")
+        finally:
+            with _prefetching_lock:
+                _prefetching.discard(user_id)
+
+    prefetch_executor.submit(run)
+
+
+@app.route("/custom_prep/jobs", methods=["POST"])
+def start_custom_prep_job():
+    if not _prep_jobs_enabled():
+        abort(404)
+
+    job_title = request.form.get("job_title", "").strip()
+    company_name = request.form.get("company_name", "").strip() or None
+    job_description = request.form.get("job_description", "").strip() or None
+
+    current_user = get_current_user()
+    resume_text, error = _resolve_custom_prep_resume(current_user)
+    if not job_title:
+        error = "Please enter at least the job position."
+    if error:
+        return jsonify({"error": error}), 400
+
+    user_id = current_user.id if current_user else None
+    owner = _prep_job_owner(current_user)
+    job_id = uuid.uuid4().hex
+
+    with _prep_jobs_lock:
+        if len(_prep_jobs) >= MAX_PREP_JOBS:
+            # Forget finished jobs nobody came back for
+            for stale_id in [k for k, (_, f) in _prep_jobs.items() if f.done()]:
+                del _prep_jobs[stale_id]
+        if len(_prep_jobs) >= MAX_PREP_JOBS:
+            return jsonify({"error": "We are generating a lot of reports right now. Please try again shortly."}), 503
+        running = sum(1 for o, f in _prep_jobs.values() if o == owner and not f.done())
+        if running >= MAX_PREP_JOBS_PER_OWNER:
+            return jsonify({"error": "Your previous prep report is still being generated. Please wait for it to finish."}), 429
+
+        future = prep_executor.submit(_run_prep_job, user_id, job_title, company_name, job_description, resume_text)
+        _prep_jobs[job_id] = (owner, future)
+
+    return jsonify(
+        {"job_id": job_id, "status_url": url_for("custom_prep_job_status", job_id=job_id)}
+    ), 202
+
+
+@app.route("/custom_prep/jobs/<job_id>", methods=["GET"])
+def custom_prep_job_status(job_id: str):
+    if not _prep_jobs_enabled():
+        abort(404)
+
+    owner = _prep_job_owner(get_current_user())
+
+    with _prep_jobs_lock:
+        entry = _prep_jobs.get(job_id)
+        if not entry or entry[0] != owner:
+            return jsonify({"error": "Job not found."}), 404
+        future = entry[1]
+        if future.done():
+            del _prep_jobs[job_id]
+
+    if not future.done():
+        return jsonify({"status": "pending"}), 200
+
+    try:
+        report_id = future.result()
+    except Exception:
+        logger.exception("Background prep job %s failed", job_id)
+        return jsonify({"status": "error", "error": "Could not generate your prep report. Please try again."}), 200
+
+    return jsonify(
+        {
+            "status": "done",
+            "report_id": report_id,
+            "report_url": url_for("view_saved_prep_report", report_id=report_id),
+        }
+    ), 200
+
+
 @app.route("/custom_prep/report/<int:report_id>", methods=["GET"])
 @login_required
 def view_saved_prep_report(report_id: int):
@@ -1346,10 +1552,11 @@ def download_saved_prep_report(report_id: int):
     if not report_row:
         abort(404)
 
-    json_str = json.dumps(report_row.report_json or {}, ensure_ascii=False, indent=2)
+    # orjson writes UTF-8 bytes directly (no str round-trip, non-ASCII kept as-is)
+    json_bytes = orjson.dumps(report_row.report_json or {}, option=orjson.OPT_INDENT_2)
 
-    response = make_response(json_str)
-    response.headers["Content-Type"] = "application/json"
+    response = make_response(json_bytes)
+    response.headers["Content-Type"] = "application/json; charset=utf-8"
     response.headers["Content-Disposition"] = (
         f"attachment; filename=prep_report_{report_row.id}.json"
     )
@@ -1432,6 +1639,8 @@ def resume_check():
 
                 if current_user:
                     prune_user_records(ResumeReport, current_user.id, keep=20)
+                    if not report.get("error"):
+                        _prefetch_prep_report(current_user.id, target_role, resume_text)
                     return redirect(url_for("view_saved_resume_report", report_id=row.id))
 
             except Exception:
@@ -1744,7 +1953,7 @@ def tts_question():
         return jsonify({"error": "No text provided"}), 400
 
     try:
-        with client.audio.speech.with_streaming_response.create(
+        with get_client().audio.speech.with_streaming_response.create(
             model="gpt-4o-mini-tts",
             voice="alloy",
             input=text,
@@ -1823,49 +2032,20 @@ def mock_interview_answer():
         print("Mock interview audio saved to:", temp_path, "size:", file_size)
 
         with open(temp_path, "rb") as f:
-            stt_resp = client.audio.transcriptions.create(
+            stt_resp = get_client().audio.transcriptions.create(
                 model="gpt-4o-mini-transcribe",
                 file=f,
             )
         transcript_text = stt_resp.text
 
-        eval_result = gpt_evaluate_answer(
-            question=question_text,
-            ideal_answer="",
-            user_answer=transcript_text,
-        )
-
-        history = session.get("mock_history", [])
-        history.append(
-            {
-                "question": question_text,
-                "answer": transcript_text,
-                "evaluation": eval_result,
-            }
-        )
-        session["mock_history"] = history
-
-        total_questions = 10
-        current_count = session.get("mock_question_count", 1)
-        job_title = session.get("mock_job_title", "")
-        company = session.get("mock_company", "")
-
-        next_intro = None
-        next_question = None
-        done = False
-        next_number = current_count
-
-        if current_count >= total_questions:
-            done = True
-        else:
-            next_number = current_count + 1
-            session["mock_question_count"] = next_number
-
-            next_intro, next_question = generate_mock_interview_question(
-                job_title=job_title,
-                company=company,
-                history=history,
-            )
+        (
+            eval_result,
+            done,
+            next_intro,
+            next_question,
+            next_number,
+            total_questions,
+        ) = advance_mock_interview(question_text, transcript_text)
 
         current_user = get_current_user()
         try:
@@ -1994,7 +2174,7 @@ def generate_mock_interview_question(job_title: str, company: str, history: list
             )
         })
 
-    resp = client.chat.completions.create(
+    resp = get_client().chat.completions.create(
         model="gpt-4o-mini",
         messages=messages,
         temperature=0.7,
@@ -2016,6 +2196,55 @@ def generate_mock_interview_question(job_title: str, company: str, history: list
     return intro, question
 
 
+def advance_mock_interview(question_text: str, answer_text: str):
+    """
+    Evaluate the candidate answer and generate the next mock interview question.
+
+    The two OpenAI calls are independent (the next question only needs the
+    question/answer history), so the evaluation runs on a worker thread while
+    the next question is generated here. Latency is max(eval, next) instead of
+    their sum. Session state is only touched from the request thread.
+    """
+    eval_future = llm_executor.submit(
+        gpt_evaluate_answer,
+        question=question_text,
+        ideal_answer="",
+        user_answer=answer_text,
+    )
+
+    history = session.get("mock_history", [])
+    entry = {"question": question_text, "answer": answer_text}
+    history.append(entry)
+
+    total_questions = 10
+    current_count = session.get("mock_question_count", 1)
+    job_title = session.get("mock_job_title", "")
+    company = session.get("mock_company", "")
+
+    next_intro = None
+    next_question = None
+    done = False
+    next_number = current_count
+
+    if current_count >= total_questions:
+        done = True
+    else:
+        next_number = current_count + 1
+        next_intro, next_question = generate_mock_interview_question(
+            job_title=job_title,
+            company=company,
+            history=history,
+        )
+
+    eval_result = eval_future.result()
+    entry["evaluation"] = eval_result
+    session["mock_history"] = history
+    if not done:
+        session["mock_question_count"] = next_number
+
+    return eval_result, done, next_intro, next_question, next_number, total_questions
+
+
 @app.route("/api/mock_interview_answer_text", methods=["POST"])
 @login_required
 def mock_interview_answer_text():
@@ -2027,43 +2256,14 @@ def mock_interview_answer_text():
         return jsonify({"error": "No answer text provided"}), 400
 
     try:
-        eval_result = gpt_evaluate_answer(
-            question=question_text,
-            ideal_answer="",
-            user_answer=answer_text,
-        )
-
-        history = session.get("mock_history", [])
-        history.append(
-            {
-                "question": question_text,
-                "answer": answer_text,
-                "evaluation": eval_result,
-            }
-        )
-        session["mock_history"] = history
-
-        total_questions = 10
-        current_count = session.get("mock_question_count", 1)
-        job_title = session.get("mock_job_title", "")
-        company = session.get("mock_company", "")
-
-        next_intro = None
-        next_question = None
-        done = False
-        next_number = current_count
-
-        if current_count >= total_questions:
-            done = True
-        else:
-            next_number = current_count + 1
-            session["mock_question_count"] = next_number
-
-            next_intro, next_question = generate_mock_interview_question(
-                job_title=job_title,
-                company=company,
-                history=history,
-            )
+        (
+            eval_result,
+            done,
+            next_intro,
+            next_question,
+            next_number,
+            total_questions,
+        ) = advance_mock_interview(question_text, answer_text)
 
         current_user = get_current_user()
         try:
@@ -2098,6 +2298,136 @@ def mock_interview_answer_text():
             {"error": f"Error processing mock interview text answer: {str(e)}"}
         ), 500
 
+# ---------------------------------------------------------------------------
+# Offline bulk commands
+# ---------------------------------------------------------------------------
+# For runs where nobody waits on a page, e.g. reviewing a whole cohort:
+#   flask --app app bulk resume-reviews resumes.jsonl reviews.jsonl
+# Report inputs are JSON Lines, one object of generator keyword arguments per
+# line; outputs are JSON Lines with one result per input, in the same order.
+# The *-batch-submit commands queue the work on the OpenAI Batch API (half
+# price, results within 24h) and save what collecting needs to a state file,
+# so *-batch-collect can run later from another shell.
+
+bulk_cli = AppGroup("bulk", help="Generate reports offline from JSON Lines files.")
+app.cli.add_command(bulk_cli)
+
+
+def _read_jsonl(path):
+    with open(path, "rb") as f:
+        return [orjson.loads(line) for line in f if line.strip()]
+
+
+def _read_batch_state(path):
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
+
+
+def _write_batch_state(path, state):
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(state))
+
+
+def _write_jsonl(path, rows):
+    with open(path, "wb") as f:
+        for row in rows:
+            f.write(orjson.dumps(row) + b"\n")
+
+
+@bulk_cli.command("prep-reports")
+@click.argument("jobs_path", type=click.Path(exists=True, dir_okay=False))
+@click.argument("out_path", type=click.Path(dir_okay=False))
+@click.option("--concurrency", type=click.IntRange(min=1), help="Default: NEXTSTEP_PREP_CONCURRENCY, else 8.")
+@click.option("--rpm", type=click.IntRange(min=1), help="Requests per minute. Default: NEXTSTEP_PREP_RPM.")
+@click.option("--tpm", type=click.IntRange(min=1), help="Tokens per minute. Default: NEXTSTEP_PREP_TPM.")
+@click.option(
+    "--shared-completion",
+    is_flag=True,
+    help="Serve several candidates per completion, one completion at a time. Cheaper when jobs repeat.",
+)
+def bulk_prep_reports(jobs_path, out_path, concurrency, rpm, tpm, shared_completion):
+    """Generate a prep report for every job in JOBS_PATH (generate_prep_report arguments)."""
+    jobs = _read_jsonl(jobs_path)
+    if shared_completion:
+        if concurrency or rpm or tpm:
+            raise click.UsageError("--shared-completion runs one completion at a time; drop --concurrency/--rpm/--tpm.")
+        reports = generate_prep_reports_batch(jobs)
+    else:
+        reports = asyncio.run(
+            generate_prep_reports_bulk(
+                jobs, max_concurrency=concurrency, requests_per_minute=rpm, tokens_per_minute=tpm
+            )
+        )
+    _write_jsonl(out_path, reports)
+    click.echo(f"Wrote {len(reports)} prep reports to {out_path}")
+
+
+@bulk_cli.command("prep-batch-submit")
+@click.argument("jobs_path", type=click.Path(exists=True, dir_okay=False))
+@click.argument("state_path", type=click.Path(dir_okay=False))
+def bulk_prep_batch_submit(jobs_path, state_path):
+    """Queue prep reports for JOBS_PATH on the Batch API."""
+    jobs = _read_jsonl(jobs_path)
+    batch_id, reports = submit_prep_report_batch(jobs)
+    _write_batch_state(state_path, {"batch_id": batch_id, "jobs": jobs, "reports": reports})
+    click.echo(f"Submitted batch {batch_id or '(nothing to submit)'}; state saved to {state_path}")
+
+
+@bulk_cli.command("prep-batch-collect")
+@click.argument("state_path", type=click.Path(exists=True, dir_okay=False))
+@click.argument("out_path", type=click.Path(dir_okay=False))
+@click.option("--poll-seconds", type=click.FloatRange(min=1), default=BATCH_API_POLL_SECONDS, show_default=True)
+def bulk_prep_batch_collect(state_path, out_path, poll_seconds):
+    """Wait for a prep report batch and write its reports."""
+    state = _read_batch_state(state_path)
+    reports = collect_prep_report_batch(state["batch_id"], state["jobs"], state["reports"], poll_seconds=poll_seconds)
+    _write_jsonl(out_path, reports)
+    click.echo(f"Wrote {len(reports)} prep reports to {out_path}")
+
+
+@bulk_cli.command("resume-reviews")
+@click.argument("jobs_path", type=click.Path(exists=True, dir_okay=False))
+@click.argument("out_path", type=click.Path(dir_okay=False))
+@click.option("--concurrency", type=click.IntRange(min=1), default=DEFAULT_RESUME_CONCURRENCY, show_default=True)
+def bulk_resume_reviews(jobs_path, out_path, concurrency):
+    """Review every resume in JOBS_PATH (generate_resume_report arguments)."""
+    jobs = _read_jsonl(jobs_path)
+    reports = asyncio.run(generate_resume_reports_bulk(jobs, max_concurrency=concurrency))
+    _write_jsonl(out_path, reports)
+    click.echo(f"Wrote {len(reports)} resume reviews to {out_path}")
+
+@bulk_cli.command("resume-batch-submit")
+@click.argument("jobs_path", type=click.Path(exists=True, dir_okay=False))
+@click.argument("state_path", type=click.Path(dir_okay=False))
+def bulk_resume_batch_submit(jobs_path, state_path):
+    """Queue resume reviews for JOBS_PATH on the Batch API."""
+    jobs = _read_jsonl(jobs_path)
+    batch_id = submit_resume_report_batch(jobs)
+    _write_batch_state(state_path, {"batch_id": batch_id, "jobs": jobs})
+    click.echo(f"Submitted batch {batch_id or '(nothing to submit)'}; state saved to {state_path}")
+
+
+@bulk_cli.command("resume-batch-collect")
+@click.argument("state_path", type=click.Path(exists=True, dir_okay=False))
+@click.argument("out_path", type=click.Path(dir_okay=False))
+@click.option("--poll-seconds", type=click.FloatRange(min=1), default=BATCH_API_POLL_SECONDS, show_default=True)
+def bulk_resume_batch_collect(state_path, out_path, poll_seconds):
+    """Wait for a resume review batch and write its reports."""
+    state = _read_batch_state(state_path)
+    reports = collect_resume_report_batch(state["batch_id"], state["jobs"], poll_seconds=poll_seconds)
+    _write_jsonl(out_path, reports)
+    click.echo(f"Wrote {len(reports)} resume reviews to {out_path}")
+
+@bulk_cli.command("transcribe")
+@click.argument("out_path", type=click.Path(dir_okay=False))
+@click.argument("audio_paths", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option("--concurrency", type=click.IntRange(min=1), default=TRANSCRIBE_CONCURRENCY, show_default=True)
+def bulk_transcribe(out_path, audio_paths, concurrency):
+    """Transcribe AUDIO_PATHS; writes one {"file", "text"} line per file."""
+    texts = asyncio.run(transcribe_batch(list(audio_paths), max_concurrency=concurrency))
+    _write_jsonl(out_path, [{"file": path, "text": text} for path, text in zip(audio_paths, texts)])
+    click.echo(f"Wrote {len(texts)} transcripts to {out_path}")
+
 # ---------------------------------------------------------------------------
 # Entrypoint
 # ---------------------------------------------------------------------------
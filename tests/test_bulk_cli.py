@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import orjson
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import app as app_module  # noqa: E402
+
+
+class BulkCliTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.runner = app_module.app.test_cli_runner()
+
+    def _path(self, name):
+        return os.path.join(self.dir.name, name)
+
+    def _write(self, name, rows):
+        with open(self._path(name), "wb") as f:
+            f.write(b"".join(orjson.dumps(row) + b"\n" for row in rows) + b"\n")
+        return self._path(name)
+
+    def _read(self, name):
+        with open(self._path(name), "rb") as f:
+            return [orjson.loads(line) for line in f]
+
+    def _invoke(self, *args):
+        result = self.runner.invoke(args=["bulk", *args])
+        self.assertEqual(result.exit_code, 0, result.output)
+        return result
+
+    def test_prep_reports(self):
+        calls = {}
+
+        async def fake_bulk(jobs, **limits):
+            calls.update(limits)
+            return [{"title": job["job_title"]} for job in jobs]
+
+        jobs = self._write("in.jsonl", [{"job_title": "Analyst"}, {"job_title": "Engineer"}])
+        with mock.patch.object(app_module, "generate_prep_reports_bulk", fake_bulk):
+            self._invoke("prep-reports", jobs, self._path("out.jsonl"), "--tpm", "90000")
+        self.assertEqual(calls, {"max_concurrency": None, "requests_per_minute": None, "tokens_per_minute": 90000})
+        self.assertEqual(self._read("out.jsonl"), [{"title": "Analyst"}, {"title": "Engineer"}])
+
+    def test_prep_reports_shared_completion(self):
+        jobs = self._write("in.jsonl", [{"job_title": "Analyst"}])
+        with mock.patch.object(app_module, "generate_prep_reports_batch", return_value=[{"title": "Analyst"}]) as batch:
+            self._invoke("prep-reports", jobs, self._path("out.jsonl"), "--shared-completion")
+        batch.assert_called_once_with([{"job_title": "Analyst"}])
+        self.assertEqual(self._read("out.jsonl"), [{"title": "Analyst"}])
+
+    def test_shared_completion_takes_no_rate_limits(self):
+        jobs = self._write("in.jsonl", [{"job_title": "Analyst"}])
+        args = ["bulk", "prep-reports", jobs, self._path("out.jsonl"), "--shared-completion", "--tpm", "1"]
+        self.assertEqual(self.runner.invoke(args=args).exit_code, 2)
+
+    def test_prep_batch_round_trip(self):
+        jobs = [{"job_title": "Analyst"}, {"job_title": ""}]
+        calls = {}
+
+        def fake_collect(batch_id, jobs, reports, poll_seconds):
+            calls.update(batch_id=batch_id, jobs=jobs, reports=reports, poll_seconds=poll_seconds)
+            return [early or {"title": job["job_title"]} for job, early in zip(jobs, reports)]
+
+        jobs_path = self._write("in.jsonl", jobs)
+        state_path = self._path("state.json")
+        with mock.patch.object(app_module, "submit_prep_report_batch", return_value=("batch_1", [None, {"error": "x"}])):
+            self._invoke("prep-batch-submit", jobs_path, state_path)
+        with mock.patch.object(app_module, "collect_prep_report_batch", fake_collect):
+            self._invoke("prep-batch-collect", state_path, self._path("out.jsonl"), "--poll-seconds", "5")
+        self.assertEqual(
+            calls, {"batch_id": "batch_1", "jobs": jobs, "reports": [None, {"error": "x"}], "poll_seconds": 5.0}
+        )
+        self.assertEqual(self._read("out.jsonl"), [{"title": "Analyst"}, {"error": "x"}])
+
+    def test_resume_reviews(self):
+        async def fake_bulk(jobs, max_concurrency):
+            return [{"role": job["target_role"], "concurrency": max_concurrency} for job in jobs]
+
+        jobs = self._write(
+            "in.jsonl",
+            [{"resume_text": "a", "target_role": "Analyst"}, {"resume_text": "b", "target_role": "Engineer"}],
+        )
+        with mock.patch.object(app_module, "generate_resume_reports_bulk", fake_bulk):
+            self._invoke("resume-reviews", jobs, self._path("out.jsonl"), "--concurrency", "3")
+        self.assertEqual(
+            self._read("out.jsonl"),
+            [{"role": "Analyst", "concurrency": 3}, {"role": "Engineer", "concurrency": 3}],
+        )
+
+    def test_resume_batch_round_trip(self):
+        jobs = [{"resume_text": "a", "target_role": "Analyst"}]
+        calls = {}
+
+        def fake_collect(batch_id, jobs, poll_seconds):
+            calls.update(batch_id=batch_id, jobs=jobs)
+            return [{"role": job["target_role"]} for job in jobs]
+
+        jobs_path = self._write("in.jsonl", jobs)
+        state_path = self._path("state.json")
+        with mock.patch.object(app_module, "submit_resume_report_batch", return_value="batch_1"):
+            self._invoke("resume-batch-submit", jobs_path, state_path)
+        with mock.patch.object(app_module, "collect_resume_report_batch", fake_collect):
+            self._invoke("resume-batch-collect", state_path, self._path("out.jsonl"))
+        self.assertEqual(calls, {"batch_id": "batch_1", "jobs": jobs})
+        self.assertEqual(self._read("out.jsonl"), [{"role": "Analyst"}])
+
+    def test_transcribe(self):
+        async def fake_transcribe(paths, max_concurrency):
+            return [f"text of {os.path.basename(p)}" for p in paths]
+
+        audio = [self._write(name, []) for name in ("a.webm", "b.webm")]
+        with mock.patch.object(app_module, "transcribe_batch", fake_transcribe):
+            self._invoke("transcribe", self._path("out.jsonl"), *audio)
+        self.assertEqual(
+            self._read("out.jsonl"),
+            [{"file": audio[0], "text": "text of a.webm"}, {"file": audio[1], "text": "text of b.webm"}],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
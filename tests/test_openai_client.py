@@ -0,0 +1,81 @@
+import unittest
+from unittest import mock
+
+from utils.openai_client import CircuitBreaker
+
+
+def _outage():
+    return ConnectionError("upstream down")
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patches = [
+            mock.patch("utils.openai_client.time.monotonic", side_effect=lambda: self.now),
+            mock.patch("utils.openai_client._is_outage", side_effect=lambda e: isinstance(e, ConnectionError)),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.breaker = CircuitBreaker(fail_max=2, reset_seconds=60)
+
+    def _open(self):
+        for _ in range(2):
+            self.breaker.failure(_outage())
+
+    def test_opens_after_consecutive_outages(self):
+        self.breaker.failure(_outage())
+        self.breaker.success()
+        self.breaker.failure(_outage())
+        self.assertTrue(self.breaker.allow())
+        self.breaker.failure(_outage())
+        self.assertFalse(self.breaker.allow())
+
+    def test_other_errors_do_not_count(self):
+        for _ in range(5):
+            self.breaker.failure(ValueError("bad request"))
+        self.assertTrue(self.breaker.allow())
+
+    def test_failures_while_open_do_not_extend_it(self):
+        self._open()
+        self.now += 50
+        self.breaker.failure(_outage())
+        self.now += 10
+        self.assertTrue(self.breaker.allow())
+
+    def test_half_open_lets_one_probe_through(self):
+        self._open()
+        self.now += 60
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+
+    def test_probe_success_closes(self):
+        self._open()
+        self.now += 60
+        self.breaker.allow()
+        self.breaker.success()
+        self.assertTrue(self.breaker.allow())
+        self.assertTrue(self.breaker.allow())
+
+    def test_probe_outage_reopens(self):
+        self._open()
+        self.now += 60
+        self.breaker.allow()
+        self.breaker.failure(_outage())
+        self.assertFalse(self.breaker.allow())
+        self.now += 60
+        self.assertTrue(self.breaker.allow())
+
+    def test_lost_probe_is_replaced(self):
+        self._open()
+        self.now += 60
+        self.breaker.allow()
+        self.now += 59
+        self.assertFalse(self.breaker.allow())
+        self.now += 1
+        self.assertTrue(self.breaker.allow())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,273 @@
+import os
+import unittest
+from unittest import mock
+
+import orjson
+
+import utils.prep_generator as pg
+
+RESUME = "Jane Doe\nData analyst building SQL pipelines and Python dashboards for finance teams. " * 8
+JD = "We need an analyst to own reporting, model revenue data in SQL and present findings weekly. " * 3
+
+
+def _model_output():
+    # A complete report in the shape the model returns
+    report = pg._ensure_sections(pg._force_counts(pg._local_fallback("Data Analyst", None, None, None)))
+    return {k: report[k] for k in pg.PREP_RESPONSE_FORMAT["json_schema"]["schema"]["properties"]}
+
+
+def _output_line(content):
+    choice = {"finish_reason": "stop", "message": {"content": content}}
+    return {"response": {"status_code": 200, "body": {"choices": [choice]}}}
+
+
+class PrepBatchApiTest(unittest.TestCase):
+    def setUp(self):
+        patches = [
+            mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test"}),
+            mock.patch.object(pg, "_RESPONSE_CACHE", pg.ResponseCache()),
+            mock.patch.object(pg, "_get_disk_cache", return_value=None),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.sent = {}
+
+    def _submit(self, jobs):
+        def submit(bodies, filename):
+            self.sent.update(bodies)
+            return "batch_1"
+
+        with mock.patch.object(pg, "submit_chat_batch", submit):
+            return pg.submit_prep_report_batch(jobs)
+
+    def test_submit_skips_jobs_answered_locally(self):
+        jobs = [
+            {"job_title": "Data Analyst", "job_description": JD, "resume_text": RESUME},
+            {"job_title": "", "resume_text": RESUME},
+        ]
+        batch_id, reports = self._submit(jobs)
+        self.assertEqual(batch_id, "batch_1")
+        self.assertEqual(list(self.sent), ["job-0"])
+        self.assertIsNone(reports[0])
+        self.assertEqual(reports[1]["debug_note"], "Missing required input: job_title")
+        # Stored between submit and collect, so it must survive JSON
+        self.assertEqual(orjson.loads(orjson.dumps(reports)), reports)
+
+    def test_nothing_to_submit(self):
+        self.assertEqual(self._submit([{"job_title": ""}])[0], "")
+        self.assertEqual(self.sent, {})
+
+    def test_quality_picks_the_model(self):
+        self._submit([{"job_title": "Data Analyst", "job_description": JD, "resume_text": RESUME, "quality": "draft"}])
+        self.assertEqual(self.sent["job-0"]["model"], pg.DRAFT_MODEL)
+        self.assertNotIn("stream", self.sent["job-0"])
+
+    def test_unsupported_arguments_are_rejected(self):
+        for key in ("semantic_cache", "model", "use_gpt"):
+            with self.assertRaises(ValueError):
+                self._submit([{"job_title": "Data Analyst", "resume_text": RESUME, key: True}])
+        self.assertEqual(self.sent, {})
+
+    def test_collect_merges_results_in_order(self):
+        jobs = [
+            {"job_title": "Data Analyst", "job_description": JD, "resume_text": RESUME},
+            {"job_title": ""},
+            {"job_title": "BI Analyst", "job_description": JD, "resume_text": RESUME},
+        ]
+        batch_id, reports = self._submit(jobs)
+        results = {"job-0": _output_line(orjson.dumps(_model_output()).decode())}
+        with mock.patch.object(pg, "wait_for_chat_batch", return_value=("completed", results)):
+            out = pg.collect_prep_report_batch(batch_id, jobs, reports)
+
+        self.assertEqual(len(out), 3)
+        self.assertIsNone(out[0]["debug_note"])
+        self.assertEqual(out[1], reports[1])
+        # No output line for the last job: local fallback with a note
+        self.assertTrue(out[2]["debug_note"])
+
+
+class BatchGroupsTest(unittest.TestCase):
+    @staticmethod
+    def _req(title, jd, resume):
+        return mock.Mock(job_title=title, company_name=None, trimmed_jd=jd, trimmed_resume=resume)
+
+    def _sizes(self, reqs):
+        with mock.patch.object(pg, "count_tokens", side_effect=len):
+            return [[i for i, _ in group] for group in pg._batch_groups(list(enumerate(reqs)))]
+
+    def test_caps_candidates_per_group(self):
+        reqs = [self._req("A", "jd", "r")] * (pg.BATCH_MAX_CANDIDATES + 1)
+        self.assertEqual(self._sizes(reqs), [list(range(pg.BATCH_MAX_CANDIDATES)), [pg.BATCH_MAX_CANDIDATES]])
+
+    def test_shared_job_description_counted_once(self):
+        with mock.patch.object(pg, "BATCH_INPUT_TOKEN_BUDGET", 100):
+            # 60 + 20 + 20 fits only because the job description is shared
+            same_job = [self._req("A", "j" * 60, "r" * 20), self._req("A", "j" * 60, "r" * 20)]
+            self.assertEqual(self._sizes(same_job), [[0, 1]])
+            other_job = [self._req("A", "j" * 60, "r" * 20), self._req("B", "k" * 60, "r" * 20)]
+            self.assertEqual(self._sizes(other_job), [[0], [1]])
+
+    def test_oversized_request_gets_its_own_group(self):
+        with mock.patch.object(pg, "BATCH_INPUT_TOKEN_BUDGET", 10):
+            self.assertEqual(self._sizes([self._req("A", "j" * 50, "r"), self._req("B", "k", "r")]), [[0], [1]])
+
+
+class EstimateInputTokensTest(unittest.TestCase):
+    def test_capped_at_budgets_without_encoding(self):
+        job = {"resume_text": "x" * 10**6, "job_description": "abcd" * 10}
+        with mock.patch.object(pg, "count_tokens", side_effect=AssertionError("encoded")):
+            self.assertEqual(pg._estimate_input_tokens(job), pg.RESUME_TOKEN_BUDGET + 10)
+        self.assertEqual(pg._estimate_input_tokens({"resume": "abcde"}), 2)
+
+
+class ExtractCandidateNameTest(unittest.TestCase):
+    def test_name_line_with_contact_details(self):
+        self.assertEqual(pg._extract_candidate_name("Jane Doe\njane@example.com | (555) 123-4567\n"), "Jane Doe")
+        self.assertEqual(pg._extract_candidate_name("Jane Doe | Boston | linkedin.com/in/jane"), "Jane Doe")
+        self.assertEqual(pg._extract_candidate_name("Mary-Kate O'Neil - Portfolio\nmk@example.com"), "Mary-Kate O'Neil")
+
+    def test_all_caps_name_is_title_cased(self):
+        self.assertEqual(pg._extract_candidate_name("JANE DOE\njane@example.com"), "Jane Doe")
+
+    def test_headings_and_titles_are_not_names(self):
+        for header in ("Software Engineer", "Professional Summary", "Boston University", "Curriculum Vitae"):
+            with self.subTest(header=header):
+                self.assertIsNone(pg._extract_candidate_name(f"{header}\njane@example.com"))
+        self.assertEqual(pg._extract_candidate_name("Senior Data Analyst\nJane Doe\njane@example.com"), "Jane Doe")
+
+    def test_no_contact_details_no_guess(self):
+        # A pasted job description or a title page
+        self.assertIsNone(pg._extract_candidate_name("Acme Corp\nWe are hiring a data analyst."))
+        self.assertIsNone(pg._extract_candidate_name("Jane Doe\nData analyst with five years of experience."))
+
+    def test_stops_at_body_text(self):
+        body = "Built reporting pipelines in SQL and Python for the finance organisation across regions."
+        self.assertIsNone(pg._extract_candidate_name(f"jane@example.com\n{body}\nJohn Smith"))
+
+
+class ScrubAnswerTest(unittest.TestCase):
+    def test_strips_labels_at_line_starts(self):
+        answer = (
+            "Situation: Our ETL broke.\n🔵 Task: Fix it fast.\n"
+            "  Action:  I rewrote the job.\n🟣Result: Runs went 4x faster."
+        )
+        self.assertEqual(
+            pg._scrub_answer(answer),
+            "Our ETL broke.\nFix it fast.\nI rewrote the job.\nRuns went 4x faster.",
+        )
+
+    def test_keeps_label_words_inside_sentences(self):
+        answer = "The Action: item list was long, so I owned the Result: a clean hand-off."
+        self.assertEqual(pg._scrub_answer(answer), answer)
+
+    def test_strips_emoji_labels_mid_line(self):
+        self.assertEqual(pg._scrub_answer("We shipped. 🟢 Action: I paired daily."), "We shipped. I paired daily.")
+
+    def test_keeps_paragraph_breaks(self):
+        self.assertEqual(pg._scrub_answer("First  part.\n\n\tSecond part. "), "First part.\n\nSecond part.")
+
+
+class FinalizeReportTest(unittest.TestCase):
+    def setUp(self):
+        patches = [
+            mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test"}),
+            mock.patch.object(pg, "_RESPONSE_CACHE", pg.ResponseCache()),
+            mock.patch.object(pg, "_get_disk_cache", return_value=None),
+            mock.patch.object(pg, "circuit_breaker"),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.req, early = pg._start_request("Data Analyst", None, JD, None, RESUME, None, "gpt-4.1-mini", True, False)
+        self.assertIsNone(early)
+
+    def test_complete_output_is_cached(self):
+        report = pg._finalize_report(self.req, _model_output())
+        self.assertEqual(pg._RESPONSE_CACHE.get(self.req.cache_key), report)
+        pg.circuit_breaker.success.assert_called_once_with()
+
+    def test_hollow_section_raises_and_is_not_cached(self):
+        data = _model_output()
+        data["improvement_zone"] = {key: [] for key in data["improvement_zone"]}
+        with self.assertRaisesRegex(ValueError, "improvement_zone"):
+            pg._finalize_report(self.req, data)
+        self.assertIsNone(pg._RESPONSE_CACHE.get(self.req.cache_key))
+        pg.circuit_breaker.success.assert_not_called()
+
+    def test_blank_items_count_as_empty(self):
+        data = _model_output()
+        data["impress_them_back"] = {key: ["  ", ""] for key in data["impress_them_back"]}
+        with self.assertRaises(ValueError):
+            pg._finalize_report(self.req, data)
+
+    def test_only_expected_sections_are_checked(self):
+        # A shard that failed leaves its sections to the defaults
+        data = _model_output()
+        data["improvement_zone"] = {key: [] for key in data["improvement_zone"]}
+        expected = tuple(k for k in pg._SECTION_FIELDS if k != "improvement_zone")
+        report = pg._finalize_report(self.req, data, cache=False, expected=expected)
+        self.assertTrue(report["improvement_zone"]["skill_gaps"])
+
+
+class ForceCountsTest(unittest.TestCase):
+    def test_ready_report_is_left_alone(self):
+        report = _model_output()
+        self.assertTrue(pg._answers_ready(report["behavioral_practice"]))
+        before = orjson.dumps(report)
+        with mock.patch.object(pg, "_finalize_answers", side_effect=AssertionError("rebuilt")):
+            self.assertEqual(orjson.dumps(pg._force_counts(report)), before)
+
+    def test_short_lists_are_padded(self):
+        report = {
+            "behavioral_practice": {"questions": ["Q1"], "example_answers": []},
+            "technical_prep": {"questions": [], "example_answers": [], "key_concepts": ["SQL"], "red_flags": []},
+        }
+        report = pg._force_counts(report)
+        beh, tech = report["behavioral_practice"], report["technical_prep"]
+        self.assertEqual((len(beh["questions"]), len(beh["example_answers"])), (6, 6))
+        self.assertEqual(beh["example_answers"][0]["question"], "Q1")
+        self.assertEqual((len(tech["questions"]), len(tech["key_concepts"]), len(tech["red_flags"])), (6, 6, 3))
+        self.assertEqual(tech["key_concepts"][0], "SQL")
+
+    def test_answers_not_ready(self):
+        block = _model_output()["behavioral_practice"]
+        self.assertFalse(pg._answers_ready(dict(block, example_answers=block["example_answers"][:5])))
+
+        labelled = [dict(ex) for ex in block["example_answers"]]
+        labelled[0]["answer"] = "Situation: the build was red."
+        self.assertFalse(pg._answers_ready(dict(block, example_answers=labelled)))
+
+        unsure = [dict(ex) for ex in block["example_answers"]]
+        unsure[0]["confidence"] = "certain"
+        self.assertFalse(pg._answers_ready(dict(block, example_answers=unsure)))
+
+
+class LowSignalGateTest(unittest.TestCase):
+    def setUp(self):
+        patches = [
+            mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test"}),
+            mock.patch.object(pg, "_RESPONSE_CACHE", pg.ResponseCache()),
+            mock.patch.object(pg, "_get_disk_cache", return_value=None),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    @staticmethod
+    def _start(resume_text, job_description):
+        return pg._start_request("Data Analyst", None, job_description, None, resume_text, None, "gpt-4.1-mini", True, True)
+
+    def test_thin_resume_and_job_description_skip_the_model(self):
+        req, report = self._start("Jane Doe, analyst.", "Analyst role.")
+        self.assertIsNone(req)
+        self.assertEqual(report["_debug"]["mode"], "low_signal")
+        self.assertTrue(report["debug_note"])
+
+    def test_either_input_is_enough(self):
+        self.assertIsNotNone(self._start(RESUME, None)[0])
+        self.assertIsNotNone(self._start("Jane Doe", JD)[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import threading
+import unittest
+from unittest import mock
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import app as app_module  # noqa: E402
+
+FORM = {"job_title": "Data Analyst", "resume_text": "Analyst with SQL and Python experience."}
+
+
+class PrepJobRoutesTest(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+        def run_job(*args):
+            self.release.wait(5)
+            return 7
+
+        patches = [
+            mock.patch.dict(os.environ, {app_module.PREP_JOBS_ENV: "1"}),
+            mock.patch.object(app_module, "_run_prep_job", run_job),
+            mock.patch.object(app_module, "_prep_jobs", {}),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.client = app_module.app.test_client()
+
+    def _start(self, client=None):
+        return (client or self.client).post("/custom_prep/jobs", data=FORM)
+
+    def test_disabled_by_default(self):
+        with mock.patch.dict(os.environ, {app_module.PREP_JOBS_ENV: ""}):
+            self.assertEqual(self._start().status_code, 404)
+            self.assertEqual(self.client.get("/custom_prep/jobs/abc").status_code, 404)
+
+    def test_job_reports_pending_then_done(self):
+        res = self._start()
+        self.assertEqual(res.status_code, 202)
+        status_url = res.get_json()["status_url"]
+        self.assertEqual(self.client.get(status_url).get_json(), {"status": "pending"})
+
+        self.release.set()
+        app_module._prep_jobs[res.get_json()["job_id"]][1].result(5)
+        data = self.client.get(status_url).get_json()
+        self.assertEqual((data["status"], data["report_id"]), ("done", 7))
+        # Finished jobs are handed out once
+        self.assertEqual(self.client.get(status_url).status_code, 404)
+
+    def test_per_owner_limit(self):
+        for _ in range(app_module.MAX_PREP_JOBS_PER_OWNER):
+            self.assertEqual(self._start().status_code, 202)
+        self.assertEqual(self._start().status_code, 429)
+        # Another anonymous session has its own allowance
+        self.assertEqual(self._start(app_module.app.test_client()).status_code, 202)
+
+    def test_global_limit(self):
+        with mock.patch.object(app_module, "MAX_PREP_JOBS", 1):
+            self.assertEqual(self._start().status_code, 202)
+            self.assertEqual(self._start(app_module.app.test_client()).status_code, 503)
+
+    def test_other_sessions_cannot_poll(self):
+        status_url = self._start().get_json()["status_url"]
+        self.assertEqual(app_module.app.test_client().get(status_url).status_code, 404)
+        self.assertEqual(self.client.get(status_url).status_code, 200)
+
+    def test_missing_job_title(self):
+        res = self.client.post("/custom_prep/jobs", data={"resume_text": FORM["resume_text"]})
+        self.assertEqual(res.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
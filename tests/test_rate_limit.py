@@ -0,0 +1,56 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from utils.rate_limit import AsyncRateLimiter
+
+
+class AsyncRateLimiterTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.waits = []
+
+        async def fake_sleep(seconds):
+            self.waits.append(round(seconds, 6))
+            self.now += seconds
+
+        patches = [
+            mock.patch("utils.rate_limit.time.monotonic", side_effect=lambda: self.now),
+            mock.patch("utils.rate_limit.asyncio.sleep", fake_sleep),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def _acquire_all(self, limiter, token_counts):
+        async def main():
+            for tokens in token_counts:
+                await limiter.acquire(tokens)
+
+        asyncio.run(main())
+        return self.waits
+
+    def test_no_limits_never_wait(self):
+        self.assertEqual(self._acquire_all(AsyncRateLimiter(), [10**6] * 5), [])
+
+    def test_request_budget(self):
+        # Starts full; then one request every 30s at 2 per minute
+        self.assertEqual(self._acquire_all(AsyncRateLimiter(requests_per_minute=2), [0, 0, 0]), [30.0])
+
+    def test_token_budget(self):
+        limiter = AsyncRateLimiter(tokens_per_minute=600)
+        self.assertEqual(self._acquire_all(limiter, [600, 300]), [30.0])
+
+    def test_budget_refills_over_time(self):
+        limiter = AsyncRateLimiter(tokens_per_minute=600)
+        self._acquire_all(limiter, [600])
+        self.now += 60
+        self.assertEqual(self._acquire_all(limiter, [600]), [])
+
+    def test_oversized_request_waits_for_a_full_bucket(self):
+        limiter = AsyncRateLimiter(tokens_per_minute=100)
+        self.assertEqual(self._acquire_all(limiter, [1000, 1000]), [60.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,231 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from utils.response_cache import AsyncSingleFlight, DiskCache, ResponseCache, SemanticCache, SingleFlight, make_cache_key
+
+try:
+    import numpy  # noqa: F401
+except ImportError:  # SemanticCache needs numpy
+    numpy = None
+
+
+class MakeCacheKeyTest(unittest.TestCase):
+    def test_parts_are_separated(self):
+        self.assertNotEqual(make_cache_key("ab", "c"), make_cache_key("a", "bc"))
+        self.assertEqual(make_cache_key("a", None), make_cache_key("a", ""))
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def test_get_returns_a_copy(self):
+        cache = ResponseCache()
+        cache.set("k", {"sections": ["a"]})
+        cache.get("k")["sections"].append("mutated")
+        self.assertEqual(cache.get("k"), {"sections": ["a"]})
+
+    def test_set_stores_a_copy(self):
+        cache = ResponseCache()
+        value = {"sections": ["a"]}
+        cache.set("k", value)
+        value["sections"].append("mutated")
+        self.assertEqual(cache.get("k"), {"sections": ["a"]})
+
+    def test_evicts_least_recently_used(self):
+        cache = ResponseCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual((cache.get("a"), cache.get("b"), cache.get("c")), (1, None, 3))
+
+    def test_entries_expire_after_ttl(self):
+        cache = ResponseCache(ttl_seconds=10)
+        with mock.patch("utils.response_cache.time.monotonic", return_value=1000.0):
+            cache.set("k", "v")
+        with mock.patch("utils.response_cache.time.monotonic", return_value=1009.9):
+            self.assertEqual(cache.get("k"), "v")
+        with mock.patch("utils.response_cache.time.monotonic", return_value=1010.0):
+            self.assertIsNone(cache.get("k"))
+
+    def test_no_ttl_never_expires(self):
+        cache = ResponseCache()
+        cache.set("k", "v")
+        with mock.patch("utils.response_cache.time.monotonic", return_value=time.monotonic() + 10**9):
+            self.assertEqual(cache.get("k"), "v")
+
+
+class DiskCacheTest(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(fd)
+
+    def tearDown(self):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def test_round_trip_returns_fresh_copies(self):
+        cache = DiskCache(self.path, ttl_seconds=60)
+        cache.set("k", {"sections": ["a"]})
+        cache.get("k")["sections"].append("mutated")
+        self.assertEqual(cache.get("k"), {"sections": ["a"]})
+
+    def test_shared_between_instances(self):
+        DiskCache(self.path, ttl_seconds=60).set("k", [1, 2])
+        self.assertEqual(DiskCache(self.path, ttl_seconds=60).get("k"), [1, 2])
+
+    def test_entries_expire_after_ttl(self):
+        cache = DiskCache(self.path, ttl_seconds=10)
+        with mock.patch("utils.response_cache.time.time", return_value=1000.0):
+            cache.set("k", "v")
+        with mock.patch("utils.response_cache.time.time", return_value=1010.0):
+            self.assertEqual(cache.get("k"), "v")
+        with mock.patch("utils.response_cache.time.time", return_value=1010.1):
+            self.assertIsNone(cache.get("k"))
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class SemanticCacheTest(unittest.TestCase):
+    @staticmethod
+    def _embed(text):
+        # Texts mentioning "python" point one way, everything else the other
+        return [1.0, 0.0] if "python" in text else [0.0, 1.0]
+
+    def test_hit_only_within_scope(self):
+        cache = SemanticCache(self._embed, threshold=0.9)
+        _, vec = cache.lookup("python dev", scope="resume-a")
+        cache.add(vec, {"report": "a"}, scope="resume-a")
+
+        self.assertEqual(cache.lookup("python engineer", scope="resume-a")[0], {"report": "a"})
+        self.assertIsNone(cache.lookup("python engineer", scope="resume-b")[0])
+        self.assertIsNone(cache.lookup("go engineer", scope="resume-a")[0])
+
+    def test_values_are_copied(self):
+        cache = SemanticCache(self._embed)
+        value = {"sections": ["a"]}
+        _, vec = cache.lookup("python")
+        cache.add(vec, value)
+        value["sections"].append("mutated")
+        cache.lookup("python")[0]["sections"].append("mutated")
+        self.assertEqual(cache.lookup("python")[0], {"sections": ["a"]})
+
+    def test_evicts_oldest_with_its_scope(self):
+        cache = SemanticCache(self._embed, max_entries=1)
+        _, vec = cache.lookup("python")
+        cache.add(vec, "first", scope="a")
+        cache.add(vec, "second", scope="b")
+        self.assertIsNone(cache.lookup("python", scope="a")[0])
+        self.assertEqual(cache.lookup("python", scope="b")[0], "second")
+
+
+class SingleFlightTest(unittest.TestCase):
+    def _run_concurrently(self, flight, fn, n=4):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        outcomes = [None] * n
+
+        def leader_fn():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return fn()
+
+        def worker(i):
+            try:
+                outcomes[i] = ("ok", flight.do("key", leader_fn))
+            except Exception as e:
+                outcomes[i] = ("error", e)
+
+        threads = [threading.Thread(target=worker, args=(0,))]
+        threads[0].start()
+        started.wait(5)
+        threads += [threading.Thread(target=worker, args=(i,)) for i in range(1, n)]
+        for t in threads[1:]:
+            t.start()
+        # Give followers time to find the call in flight before it finishes
+        time.sleep(0.05)
+        release.set()
+        for t in threads:
+            t.join(5)
+        return calls, outcomes
+
+    def test_followers_share_one_call_and_get_copies(self):
+        calls, outcomes = self._run_concurrently(SingleFlight(), lambda: {"sections": []})
+        self.assertEqual(len(calls), 1)
+        values = [value for _, value in outcomes]
+        self.assertTrue(all(v == {"sections": []} for v in values))
+        self.assertEqual(len({id(v) for v in values}), len(values))
+
+    def test_errors_propagate_to_every_caller(self):
+        def fail():
+            raise RuntimeError("boom")
+
+        flight = SingleFlight()
+        calls, outcomes = self._run_concurrently(flight, fail)
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(kind == "error" and str(e) == "boom" for kind, e in outcomes))
+        # The failed call is not remembered
+        self.assertEqual(flight.do("key", lambda: "retry"), "retry")
+
+
+class AsyncSingleFlightTest(unittest.TestCase):
+    def test_followers_share_one_call(self):
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"sections": []}
+
+        async def main():
+            flight = AsyncSingleFlight()
+            return await asyncio.gather(*(flight.do("key", fetch) for _ in range(4)))
+
+        results = asyncio.run(main())
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(r == {"sections": []} for r in results))
+
+    def test_errors_propagate_to_every_caller(self):
+        calls = []
+
+        async def fail():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        async def main():
+            flight = AsyncSingleFlight()
+            results = await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+            return results, await flight.do("key", lambda: asyncio.sleep(0, result="retry"))
+
+        results, retry = asyncio.run(main())
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+        self.assertEqual(retry, "retry")
+
+    def test_cancelling_the_first_caller_keeps_the_call_running(self):
+        async def fetch():
+            await asyncio.sleep(0.02)
+            return {"sections": []}
+
+        async def main():
+            flight = AsyncSingleFlight()
+            leader = asyncio.ensure_future(flight.do("key", fetch))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.do("key", fetch))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower, leader.cancelled()
+
+        result, leader_cancelled = asyncio.run(main())
+        self.assertEqual(result, {"sections": []})
+        self.assertTrue(leader_cancelled)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import unittest
+from unittest import mock
+
+import utils.resume_review_generator as rr
+from utils import text_budget
+
+
+def _user_message(resume_text, job_description=None):
+    kwargs = rr._completion_kwargs(resume_text, "Data Analyst", job_description, "gpt-4.1-mini")
+    return kwargs["messages"][1]["content"]
+
+
+class CompletionInputsTest(unittest.TestCase):
+    def setUp(self):
+        # Character budgets, so sizes do not depend on tiktoken being available
+        patcher = mock.patch.object(text_budget, "_get_encoder", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_resume_clipped_to_token_budget(self):
+        limit = rr.RESUME_TOKEN_BUDGET * text_budget.CHARS_PER_TOKEN
+        message = _user_message("a" * (limit + 100) + "TAIL")
+        self.assertIn("a" * limit, message)
+        self.assertNotIn("a" * (limit + 1), message)
+        self.assertNotIn("TAIL", message)
+
+    def test_whitespace_and_boilerplate_are_compacted(self):
+        message = _user_message(
+            "Jane   Doe\n\n\n\nSQL",
+            "Own reporting.\n- Own reporting.\nWe are an equal opportunity employer.",
+        )
+        self.assertIn("Jane Doe\n\nSQL", message)
+        self.assertEqual(message.count("Own reporting."), 1)
+        self.assertNotIn("equal opportunity", message)
+
+    def test_same_resume_shares_the_prompt_cache_key(self):
+        first = rr._completion_kwargs("Jane Doe, analyst", "Data Analyst", None, "gpt-4.1-mini")
+        second = rr._completion_kwargs("Jane Doe, analyst", "BI Developer", "Build dashboards.", "gpt-4.1-mini")
+        self.assertEqual(first["prompt_cache_key"], second["prompt_cache_key"])
+
+
+class ShortResumeGateTest(unittest.TestCase):
+    def test_counts_only_words_with_letters(self):
+        self.assertTrue(rr._has_min_words("Python analyst " * 25, 50))
+        self.assertFalse(rr._has_min_words("Python analyst " * 24 + "SQL", 50))
+        # PDF debris: bullets, page numbers, dates, single letters
+        debris = "• 1 2023-01 | - 42 x y z " * 100
+        self.assertFalse(rr._has_min_words(debris, 50))
+
+    def test_short_resume_skips_the_model(self):
+        with mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test"}), mock.patch.object(rr, "get_client") as client:
+            report = rr.generate_resume_report("Jane Doe\n• 555-0100 • 2021 - 2024", "Data Analyst")
+        client.assert_not_called()
+        self.assertIn("Not enough resume text", report["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
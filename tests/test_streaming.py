@@ -0,0 +1,83 @@
+import random
+import unittest
+
+import orjson
+
+from utils.streaming import JsonMemberScanner
+
+REPORT = {
+    "summary": 'He said "ship it" \\ then left, {not a brace} [nor a bracket], commas, too',
+    "sections": {"skills": {"strengths": ["Python", "Zoë's café ☕", ""], "issues": []}},
+    "keywords": ["a,b", "c}d", "e]f", 'one " quote, then {brace', "trailing backslash \\", "é中\U0001f600"],
+    "score": 7.5,
+    "flags": [True, False, None],
+    "empty": {},
+}
+PAYLOAD = orjson.dumps(REPORT)
+
+
+def _feed_all(chunks):
+    scanner = JsonMemberScanner()
+    members = []
+    for chunk in chunks:
+        members.extend(scanner.feed(chunk))
+    return scanner, members
+
+
+class JsonMemberScannerTest(unittest.TestCase):
+    def test_whole_object_in_one_chunk(self):
+        scanner, members = _feed_all([PAYLOAD])
+        self.assertEqual(dict(members), REPORT)
+        self.assertEqual(scanner.result(), REPORT)
+
+    def test_every_two_way_split(self):
+        # Covers splits inside strings, escapes, nested containers and
+        # multi-byte UTF-8 sequences
+        for i in range(len(PAYLOAD) + 1):
+            scanner, members = _feed_all([PAYLOAD[:i], PAYLOAD[i:]])
+            self.assertEqual(scanner.result(), REPORT, f"split at byte {i}")
+            self.assertEqual([k for k, _ in members], list(REPORT), f"split at byte {i}")
+
+    def test_byte_at_a_time(self):
+        scanner, members = _feed_all(PAYLOAD[i : i + 1] for i in range(len(PAYLOAD)))
+        self.assertEqual(dict(members), REPORT)
+        self.assertEqual(scanner.result(), REPORT)
+
+    def test_random_chunks(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            chunks, i = [], 0
+            while i < len(PAYLOAD):
+                n = rng.randint(1, 40)
+                chunks.append(PAYLOAD[i : i + n])
+                i += n
+            self.assertEqual(_feed_all(chunks)[0].result(), REPORT)
+
+    def test_members_emitted_as_they_close(self):
+        scanner = JsonMemberScanner()
+        first_end = PAYLOAD.index(b',"sections"')
+        self.assertEqual(scanner.feed(PAYLOAD[:first_end]), [])
+        self.assertEqual(scanner.feed(PAYLOAD[first_end : first_end + 1]), [("summary", REPORT["summary"])])
+
+    def test_pretty_printed_input(self):
+        payload = orjson.dumps(REPORT, option=orjson.OPT_INDENT_2)
+        self.assertEqual(_feed_all([payload[:57], payload[57:]])[0].result(), REPORT)
+
+    def test_empty_object(self):
+        scanner, members = _feed_all([b"{", b"}"])
+        self.assertEqual(members, [])
+        self.assertEqual(scanner.result(), {})
+
+    def test_incomplete_object_raises(self):
+        scanner, _ = _feed_all([PAYLOAD[:-1]])
+        with self.assertRaises(ValueError):
+            scanner.result()
+
+    def test_buffer_only_holds_the_member_in_progress(self):
+        scanner = JsonMemberScanner()
+        scanner.feed(PAYLOAD[: PAYLOAD.index(b'"keywords"')])
+        self.assertLess(len(scanner._buf), len(b'"keywords"'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from unittest import mock
+
+from utils import text_budget
+from utils.text_budget import _surely_fits, clip_to_tokens, select_resume_sections
+
+
+class ByteEncoder:
+    # One token per UTF-8 byte, so counts are predictable without tiktoken
+    def encode(self, text, disallowed_special=()):
+        return list(text.encode("utf-8"))
+
+    def decode(self, tokens):
+        return bytes(tokens).decode("utf-8", errors="ignore")
+
+
+def _with_encoder(encoder):
+    return mock.patch.object(text_budget, "_get_encoder", return_value=encoder)
+
+
+class SurelyFitsTest(unittest.TestCase):
+    def test_ascii_by_length(self):
+        self.assertTrue(_surely_fits("a" * 10, 10))
+        self.assertFalse(_surely_fits("a" * 11, 10))
+
+    def test_non_ascii_by_bytes(self):
+        self.assertTrue(_surely_fits("é" * 5, 10))
+        self.assertFalse(_surely_fits("é" * 6, 10))
+
+
+class ClipToTokensTest(unittest.TestCase):
+    def test_short_text_skips_the_tokenizer(self):
+        with mock.patch.object(text_budget, "_get_encoder", side_effect=AssertionError("loaded")):
+            self.assertEqual(clip_to_tokens("short text", 100), "short text")
+            self.assertEqual(clip_to_tokens(None, 100), "")
+
+    def test_clips_to_token_prefix(self):
+        with _with_encoder(ByteEncoder()):
+            self.assertEqual(clip_to_tokens("abcdefghij", 4), "abcd")
+
+    def test_text_within_budget_after_encoding(self):
+        # More characters than the budget but few enough tokens
+        encoder = mock.Mock(encode=lambda text, disallowed_special=(): text.split())
+        with _with_encoder(encoder):
+            self.assertEqual(clip_to_tokens("one two three", 5), "one two three")
+
+    def test_character_fallback_without_tokenizer(self):
+        with _with_encoder(None):
+            self.assertEqual(clip_to_tokens("x" * 100, 10), "x" * 10 * text_budget.CHARS_PER_TOKEN)
+
+
+HEADER = "Jane Doe\njane@example.com\n"
+HOBBIES = "Hobbies\nChess and hiking.\n"
+EXPERIENCE = "Experience\nData analyst at Acme, SQL and Python.\n"
+EDUCATION = "Education\nBS Statistics.\n"
+RESUME = HEADER + HOBBIES + EXPERIENCE + EDUCATION
+
+
+class SelectResumeSectionsTest(unittest.TestCase):
+    def setUp(self):
+        patcher = _with_encoder(ByteEncoder())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_resume_within_budget_is_unchanged(self):
+        self.assertEqual(select_resume_sections(RESUME, "Data Analyst", len(RESUME)), RESUME)
+
+    def test_keeps_header_and_experience_first_in_original_order(self):
+        budget = len(HEADER) + len(EXPERIENCE) + len(EDUCATION)
+        self.assertEqual(select_resume_sections(RESUME, "Data Analyst", budget), HEADER + EXPERIENCE + EDUCATION)
+
+    def test_partially_keeps_the_next_section(self):
+        budget = len(HEADER) + len(EXPERIENCE) + 5
+        self.assertEqual(select_resume_sections(RESUME, "Data Analyst", budget), HEADER + EXPERIENCE + EDUCATION[:5])
+
+    def test_sections_mentioning_the_title_win_ties(self):
+        awards = "Awards\nDean's list.\n"
+        volunteering = "Volunteering\nTaught statistics to teens.\n"
+        resume = HEADER + awards + volunteering
+        budget = len(HEADER) + len(volunteering)
+        self.assertEqual(select_resume_sections(resume, "Statistics Tutor", budget), HEADER + volunteering)
+
+    def test_without_headings_clips(self):
+        self.assertEqual(select_resume_sections("x" * 50, "Analyst", 10), "x" * 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+OpenAI Batch API plumbing shared by the report generators.
+
+Batch jobs cost half as much per token, run against a separate rate-limit
+pool and finish within 24h, which suits bulk and overnight runs where
+nobody is waiting on the page.
+"""
+import time
+from typing import Any, Dict, List, Tuple
+
+import orjson
+
+from utils.openai_client import get_client
+from utils.structured_output import check_finish_reason
+
+# How often wait_for_chat_batch checks on a job
+BATCH_API_POLL_SECONDS = 30.0
+
+_DONE = ("completed", "failed", "expired", "cancelled")
+
+
+def submit_chat_batch(bodies: List[Tuple[str, Dict[str, Any]]], filename: str) -> str:
+    """
+    Upload (custom_id, chat.completions body) pairs as one batch and return
+    its id. Bodies must not ask for streaming.
+    """
+    lines = [
+        orjson.dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body})
+        for custom_id, body in bodies
+    ]
+    client = get_client()
+    batch_file = client.files.create(file=(filename, b"\n".join(lines)), purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    return batch.id
+
+
+def wait_for_chat_batch(batch_id: str, poll_seconds: float = BATCH_API_POLL_SECONDS) -> Tuple[str, Dict[str, Any]]:
+    """
+    Block until the batch finishes; return (status, {custom_id: output line}).
+    """
+    client = get_client()
+    batch = client.batches.retrieve(batch_id)
+    while batch.status not in _DONE:
+        time.sleep(poll_seconds)
+        batch = client.batches.retrieve(batch_id)
+
+    results: Dict[str, Any] = {}
+    if batch.output_file_id:
+        for line in client.files.content(batch.output_file_id).read().splitlines():
+            item = orjson.loads(line)
+            results[item["custom_id"]] = item
+    return batch.status, results
+
+
+def batch_message_content(item: Any, batch_id: str, status: str) -> bytes:
+    """
+    The assistant message content of one output line, as UTF-8 bytes.
+    Raises ValueError for missing, failed, refused or cut-off requests.
+    """
+    item = item or {}
+    response = item.get("response") or {}
+    if response.get("status_code") != 200:
+        raise ValueError(item.get("error") or f"Batch {batch_id} ended with status {status}")
+    choice = response["body"]["choices"][0]
+    check_finish_reason(choice.get("finish_reason"), f"batch {batch_id}")
+    message = choice["message"]
+    if message.get("refusal"):
+        raise ValueError(f"Model refused the request: {message['refusal']}")
+    return (message.get("content") or "").encode("utf-8")
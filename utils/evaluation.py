@@ -1,11 +1,21 @@
+import asyncio
 import os
-import json
-from typing import Dict
+import logging
+from typing import Dict, List
 
-from openai import OpenAI
+from utils.openai_client import get_async_client, get_client
+from utils.structured_output import json_schema_format, parse_message, strict_object
 
-# Single OpenAI client (uses OPENAI_API_KEY from env)
-client = OpenAI()
+logger = logging.getLogger(__name__)
+
+WARMUP_ENV = "NEXTSTEP_WARMUP"  # set to "1"
+DEFAULT_EVAL_MODEL = "gpt-4.1-mini"
+TRANSCRIBE_MODEL = "gpt-4o-mini-transcribe"
+TRANSCRIBE_CONCURRENCY = 8  # stay well under the audio endpoint rate limits
+
+# Answers shorter than this cannot contain a STAR story; score them locally
+MIN_ANSWER_WORDS = 10
+SHORT_ANSWER_SCORE = 20.0
 
 # System prompt for GPT based evaluation
 SYSTEM_PROMPT = """
@@ -54,72 +64,160 @@ Return a JSON object with EXACTLY these fields:
 }
 """
 
+# Structured Outputs: the model is constrained to this schema at decode time
+_STR_LIST = {"type": "array", "items": {"type": "string"}}
+
+EVALUATION_RESPONSE_FORMAT = json_schema_format(
+    "answer_evaluation",
+    strict_object(
+        {
+            "relevance_score": {"type": "number"},
+            "confidence_score": {"type": "number"},
+            "final_score": {"type": "number"},
+            "strengths": _STR_LIST,
+            "improvements": _STR_LIST,
+            "rewritten_answer": strict_object({"star": {"type": "string"}, "concise": {"type": "string"}}),
+        }
+    ),
+)
+
+# User prompt template. Variable content goes last, after the byte-identical
+# SYSTEM_PROMPT, so OpenAI's automatic prompt caching can reuse the prefix.
+USER_PROMPT_TEMPLATE = """
+Analyze the interview answer below.
+
+1. Score it strictly using the STAR framework.
+2. List up to 3 strengths.
+3. List up to 3 concrete improvements.
+4. Rewrite the answer in TWO ways:
+   - A strong STAR-based version (preserve the candidate's experience).
+   - A concise, high-impact version suitable for a real interview.
+
+Question:
+{question}
+
+Ideal answer description (if any):
+{ideal_answer}
+
+Candidate answer:
+{user_answer}
+"""
+
+
+def warmup() -> None:
+    """
+    Open the pooled HTTPS connection to OpenAI at process start, so the first
+    user request does not pay DNS + TLS setup inside the request path.
+
+    Best effort only: a failure here never blocks startup.
+    """
+    try:
+        get_client().models.retrieve(DEFAULT_EVAL_MODEL)
+        logger.info("OpenAI client warmed up (model=%s)", DEFAULT_EVAL_MODEL)
+    except Exception as e:
+        logger.warning("OpenAI warmup failed: %s", e)
+
 
 def transcribe_audio_whisper(file_path: str) -> str:
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"Audio file does not exist: {file_path}")
 
     with open(file_path, "rb") as f:
-        resp = client.audio.transcriptions.create(
-            model="gpt-4o-mini-transcribe",
+        resp = get_client().audio.transcriptions.create(
+            model=TRANSCRIBE_MODEL,
             file=f,
         )
 
     return resp.text
 
 
+def _read_bytes(file_path: str) -> bytes:
+    with open(file_path, "rb") as f:
+        return f.read()
+
+
+async def transcribe_audio_whisper_async(file_path: str) -> str:
+    """
+    Async variant of transcribe_audio_whisper.
+
+    The file read runs in a worker thread and the upload awaits on the shared
+    AsyncOpenAI client, so many transcriptions can be in flight on one loop.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"Audio file does not exist: {file_path}")
+
+    audio_bytes = await asyncio.to_thread(_read_bytes, file_path)
+    resp = await get_async_client().audio.transcriptions.create(
+        model=TRANSCRIBE_MODEL,
+        file=(os.path.basename(file_path), audio_bytes),
+    )
+
+    return resp.text
+
+
+async def transcribe_batch(
+    file_paths: List[str],
+    max_concurrency: int = TRANSCRIBE_CONCURRENCY,
+) -> List[str]:
+    """
+    Transcribe several audio files concurrently, at most max_concurrency at a time.
+    Results are returned in the same order as file_paths.
+    """
+    sem = asyncio.Semaphore(max_concurrency)
+
+    async def _one(path: str) -> str:
+        async with sem:
+            return await transcribe_audio_whisper_async(path)
+
+    return list(await asyncio.gather(*(_one(p) for p in file_paths)))
+
+
 def gpt_evaluate_answer(
     question: str,
     ideal_answer: str,
     user_answer: str,
-    model: str = "gpt-4.1-mini",
+    model: str = DEFAULT_EVAL_MODEL,
 ) -> Dict:
     """
     Evaluate an interview answer and generate improvements + rewrites.
-    """
-
-    user_prompt = f"""
-Analyze the interview answer below.
-
-1. Score it strictly using the STAR framework.
-2. List up to 3 strengths.
-3. List up to 3 concrete improvements.
-4. Rewrite the answer in TWO ways:
-   - A strong STAR-based version (preserve the candidate's experience).
-   - A concise, high-impact version suitable for a real interview.
 
-Question:
-{question}
-
-Ideal answer description (if any):
-{ideal_answer[:800]}
+    Answers under MIN_ANSWER_WORDS words are scored locally without calling
+    OpenAI, since the rubric guarantees a very low score for them anyway.
+    """
+    if len((user_answer or "").split()) < MIN_ANSWER_WORDS:
+        return _short_answer_result(question, user_answer)
 
-Candidate answer:
-{user_answer[:1200]}
-"""
+    user_prompt = USER_PROMPT_TEMPLATE.format_map(
+        {
+            "question": question,
+            "ideal_answer": ideal_answer[:800],
+            "user_answer": user_answer[:1200],
+        }
+    )
 
-    response = client.chat.completions.create(
+    response = get_client().chat.completions.create(
         model=model,
         messages=[
             {"role": "system", "content": SYSTEM_PROMPT},
             {"role": "user", "content": user_prompt},
         ],
-        response_format={"type": "json_object"},
+        response_format=EVALUATION_RESPONSE_FORMAT,
         temperature=0.4,
     )
 
-    data = json.loads(response.choices[0].message.content)
+    # Shape is guaranteed by the strict JSON schema, no defensive defaults needed
+    data = parse_message(response.choices[0].message, "evaluate the answer")
 
-    rel = float(data.get("relevance_score", 0))
-    conf = float(data.get("confidence_score", 0))
-    final_score = float(data.get("final_score", 0))
+    rel = float(data["relevance_score"])
+    conf = float(data["confidence_score"])
+    final_score = float(data["final_score"])
 
-    strengths = data.get("strengths", [])[:3]
-    improvements = data.get("improvements", [])[:3]
+    strengths = data["strengths"][:3]
+    improvements = data["improvements"][:3]
 
-    rewritten = data.get("rewritten_answer", {}) or {}
-    star_rewrite = rewritten.get("star", "").strip()
-    concise_rewrite = rewritten.get("concise", "").strip()
+    rewritten = data["rewritten_answer"]
+    star_rewrite = rewritten["star"].strip()
+    concise_rewrite = rewritten["concise"].strip()
 
     return {
         "question": question,
@@ -136,6 +234,27 @@ Candidate answer:
     }
 
 
+def _short_answer_result(question: str, user_answer: str) -> Dict:
+    return {
+        "question": question,
+        "user_answer": user_answer,
+        "relevance_score": SHORT_ANSWER_SCORE,
+        "confidence_score": SHORT_ANSWER_SCORE,
+        "final_score": SHORT_ANSWER_SCORE,
+        "strengths": [],
+        "improvements": [
+            "Answer too short to evaluate. Expand it into a full STAR story.",
+            "Expand your answer: describe the Situation and the Task you owned.",
+            "Explain the concrete Actions you took, step by step.",
+            "Close with a measurable Result or impact.",
+        ],
+        "rewritten_answer": {
+            "star": "",
+            "concise": "",
+        },
+    }
+
+
 def evaluate_answer(question: str, ideal_answer: str, user_answer: str) -> Dict:
     """
     Backwards-compatible wrapper.
@@ -0,0 +1,218 @@
+"""
+Shared OpenAI clients for the utils modules and the Flask app.
+
+One client per process means one httpx connection pool: successive calls
+reuse keep-alive connections and TLS sessions instead of paying a new
+handshake per report / evaluation.
+
+The openai package (~0.4s to import) is only loaded when a client is first
+built, so processes and requests that never call the API don't pay for it.
+"""
+import atexit
+import importlib.util
+import logging
+import os
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRIES_ENV = "NEXTSTEP_OPENAI_MAX_RETRIES"  # integer, default below
+MAX_CONNECTIONS_ENV = "NEXTSTEP_OPENAI_MAX_CONNECTIONS"  # integer, default below
+HTTP2_ENV = "NEXTSTEP_OPENAI_HTTP2"  # set to "0" to force HTTP/1.1
+TIMEOUT_ENV = "NEXTSTEP_OPENAI_TIMEOUT"  # seconds, default below
+
+# Retries on connection errors, 408/409/429 and 5xx, with exponential
+# backoff plus jitter (honoring Retry-After). Callers only fall back to
+# their local templates once these are exhausted.
+DEFAULT_MAX_RETRIES = 3
+
+# Sized for the prep/report thread pools plus gunicorn worker threads; idle
+# keep-alive connections are capped at half so bursts don't pin sockets.
+DEFAULT_MAX_CONNECTIONS = 64
+
+# The SDK default is 10 minutes, which leaves a request thread hanging on a
+# stalled connection. Reads are per chunk, so streamed reports are not cut
+# off as long as tokens keep arriving; a non-streamed call must finish its
+# whole completion within the limit, so long outputs (prep reports, resume
+# reviews) are always streamed.
+DEFAULT_TIMEOUT_SECONDS = 60.0
+CONNECT_TIMEOUT_SECONDS = 5.0
+
+# Circuit breaker: after this many consecutive outage-type failures (each
+# one already retried), skip OpenAI for BREAKER_RESET_SECONDS so requests
+# get their local fallback at once instead of queueing on a dead upstream
+BREAKER_FAIL_MAX = 5
+BREAKER_RESET_SECONDS = 60.0
+
+# Built lazily on first use (uses OPENAI_API_KEY from env)
+_client: Optional["OpenAI"] = None
+_async_client: Optional["AsyncOpenAI"] = None
+_client_lock = threading.Lock()
+
+
+def api_key_configured() -> bool:
+    """
+    Whether OPENAI_API_KEY is set. Callers check this before building a
+    request, so an unconfigured deployment answers from its local fallback
+    at once instead of raising on every call.
+    """
+    return bool(os.getenv("OPENAI_API_KEY", "").strip())
+
+
+def get_client() -> "OpenAI":
+    """
+    Return the process-wide OpenAI client.
+
+    Double-checked locking: concurrent first requests on a threaded server
+    must not each build their own client and connection pool.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import DefaultHttpxClient, OpenAI
+
+                _client = OpenAI(
+                    max_retries=_max_retries(),
+                    timeout=_timeout(),
+                    http_client=DefaultHttpxClient(limits=_limits(), http2=_http2()),
+                )
+                atexit.register(_client.close)
+    return _client
+
+
+def get_async_client() -> "AsyncOpenAI":
+    """
+    Return the process-wide AsyncOpenAI client, for callers on an event loop.
+    """
+    global _async_client
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+                _async_client = AsyncOpenAI(
+                    max_retries=_max_retries(),
+                    timeout=_timeout(),
+                    http_client=DefaultAsyncHttpxClient(limits=_limits(), http2=_http2()),
+                )
+    return _async_client
+
+
+def _max_retries() -> int:
+    raw = os.getenv(MAX_RETRIES_ENV, "").strip()
+    try:
+        return max(0, int(raw)) if raw else DEFAULT_MAX_RETRIES
+    except ValueError:
+        return DEFAULT_MAX_RETRIES
+
+
+def _timeout() -> Any:
+    from openai import Timeout
+
+    raw = os.getenv(TIMEOUT_ENV, "").strip()
+    try:
+        seconds = max(1.0, float(raw)) if raw else DEFAULT_TIMEOUT_SECONDS
+    except ValueError:
+        seconds = DEFAULT_TIMEOUT_SECONDS
+    return Timeout(seconds, connect=min(seconds, CONNECT_TIMEOUT_SECONDS))
+
+
+def _limits() -> Any:
+    from openai import DEFAULT_CONNECTION_LIMITS
+
+    raw = os.getenv(MAX_CONNECTIONS_ENV, "").strip()
+    try:
+        max_connections = max(1, int(raw)) if raw else DEFAULT_MAX_CONNECTIONS
+    except ValueError:
+        max_connections = DEFAULT_MAX_CONNECTIONS
+    # Built from the SDK's own Limits type, so this follows whichever httpx
+    # package the installed SDK is built on.
+    return type(DEFAULT_CONNECTION_LIMITS)(
+        max_connections=max_connections,
+        max_keepalive_connections=max(1, max_connections // 2),
+    )
+
+
+def _http2() -> bool:
+    # HTTP/2 multiplexes concurrent requests over one connection, but httpx
+    # only supports it with the optional "h2" package installed.
+    if os.getenv(HTTP2_ENV, "").strip() == "0":
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.info("h2 not installed, OpenAI clients will use HTTP/1.1")
+        return False
+    return True
+
+
+class CircuitBreaker:
+    """
+    Process-wide breaker for OpenAI calls.
+
+    Callers check allow() before calling and report the outcome with
+    success() / failure(exc). Only outage-type errors count; once
+    fail_max of them happen in a row the breaker opens for reset_seconds.
+    After that it is half-open: allow() lets a single probe call through,
+    whose success closes the breaker and whose outage reopens it. A probe
+    that never reports back is replaced after another reset_seconds.
+    """
+
+    def __init__(self, fail_max: int = BREAKER_FAIL_MAX, reset_seconds: float = BREAKER_RESET_SECONDS) -> None:
+        self.fail_max = fail_max
+        self.reset_seconds = reset_seconds
+        self._state = "closed"  # "closed", "open" or "half_open"
+        self._failures = 0
+        self._opened_at = 0.0  # when the breaker opened, or the probe started
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == "closed":
+                return True
+            if time.monotonic() - self._opened_at < self.reset_seconds:
+                return False
+            self._state = "half_open"
+            self._opened_at = time.monotonic()
+            return True
+
+    def success(self) -> None:
+        with self._lock:
+            self._state = "closed"
+            self._failures = 0
+
+    def failure(self, exc: BaseException) -> None:
+        with self._lock:
+            if not _is_outage(exc):
+                # OpenAI answered, so a probe has done its job
+                if self._state == "half_open":
+                    self._state = "closed"
+                    self._failures = 0
+                return
+            if self._state == "open":
+                # Calls that started before the breaker opened; the reset
+                # window runs from the opening
+                return
+            self._failures += 1
+            if self._state == "half_open" or self._failures >= self.fail_max:
+                if self._state == "closed":
+                    logger.warning("OpenAI circuit breaker open for %ss: %s", self.reset_seconds, exc)
+                self._state = "open"
+                self._opened_at = time.monotonic()
+
+
+def _is_outage(exc: BaseException) -> bool:
+    # "OpenAI is down or saturated", not "this request is bad". An SDK
+    # error can only exist once openai is imported, so don't import it here.
+    openai = sys.modules.get("openai")
+    return openai is not None and isinstance(
+        exc, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+    )
+
+
+circuit_breaker = CircuitBreaker()
@@ -0,0 +1,51 @@
+"""
+Client-side request/token budgets for bulk OpenAI calls.
+
+A concurrency cap alone still lets a burst of large prompts blow through the
+account's tokens-per-minute limit and come back as 429s. Waiting locally
+for budget keeps bulk runs just under the limits instead.
+"""
+import asyncio
+import time
+from typing import Optional
+
+
+class AsyncRateLimiter:
+    """
+    Token buckets for requests and tokens per minute, refilled continuously
+    (the approach of OpenAI's api_request_parallel_processor).
+
+    Callers await acquire(tokens) before each request. Waiters are served in
+    order; a limit of None means no limit on that dimension. Create one per
+    event loop.
+    """
+
+    def __init__(self, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None) -> None:
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute or 0)
+        self._tokens = float(tokens_per_minute or 0)
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int) -> None:
+        rpm, tpm = self.requests_per_minute, self.tokens_per_minute
+        # A single request larger than the whole budget must still run eventually
+        tokens = min(tokens, tpm) if tpm else 0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                elapsed, self._last = now - self._last, now
+                if rpm:
+                    self._requests = min(float(rpm), self._requests + elapsed * rpm / 60.0)
+                if tpm:
+                    self._tokens = min(float(tpm), self._tokens + elapsed * tpm / 60.0)
+
+                request_wait = (1 - self._requests) * 60.0 / rpm if rpm and self._requests < 1 else 0.0
+                token_wait = (tokens - self._tokens) * 60.0 / tpm if tpm and self._tokens < tokens else 0.0
+                if not request_wait and not token_wait:
+                    if rpm:
+                        self._requests -= 1
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep(max(request_wait, token_wait))
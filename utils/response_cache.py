@@ -0,0 +1,249 @@
+"""
+In-process caches for LLM responses.
+
+Report generation is dominated by the OpenAI round trip (seconds of latency
+and per-token cost), so repeated or near-duplicate requests are served from
+memory instead of calling the model again.
+"""
+import asyncio
+import copy
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import orjson
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+def make_cache_key(*parts: Optional[str]) -> str:
+    """
+    SHA-256 over the parts, NUL-separated so ("ab", "c") != ("a", "bc").
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        h.update((part or "").encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class ResponseCache:
+    """
+    Thread-safe exact-match LRU cache. With ttl_seconds, entries also expire
+    that long after they are set.
+
+    Values are deep-copied on the way in and out, so callers can mutate the
+    report they get back without corrupting the cached copy.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl_seconds: Optional[float] = None) -> None:
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at and time.monotonic() >= expires_at:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any) -> None:
+        value = copy.deepcopy(value)
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else 0.0
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class DiskCache:
+    """
+    Exact-match cache in a SQLite file, shared by every worker process and
+    kept across restarts. Entries expire `ttl_seconds` after they are set.
+
+    Values are stored as JSON, so each get() returns a fresh copy.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        return orjson.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any) -> None:
+        blob = orjson.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, blob, time.time() + self.ttl_seconds),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour cache keyed by text embeddings.
+
+    Vectors are L2-normalized on insert, so a single matrix-vector product
+    gives the cosine similarity against every stored entry. A lookup hits
+    when the best similarity is at least `threshold`. Oldest entries are
+    evicted first once `max_entries` is reached.
+
+    Each entry belongs to a `scope` and a lookup only matches entries of
+    its own scope, so values derived from private input (e.g. one user's
+    resume) are never served for someone else's similar-looking request.
+
+    numpy is imported on first use, so the cache costs nothing at import
+    time when it stays switched off.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[str], List[float]],
+        threshold: float = 0.92,
+        max_entries: int = 512,
+    ) -> None:
+        self._embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._vectors: "Optional[np.ndarray]" = None  # (n, d) float32, unit rows
+        self._values: List[Any] = []
+        self._scopes: List[str] = []
+        self._lock = threading.Lock()
+
+    def embed(self, text: str) -> "np.ndarray":
+        import numpy as np
+
+        vec = np.asarray(self._embed(text), dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else vec
+
+    def lookup(self, text: str, scope: str = "") -> Tuple[Optional[Any], "np.ndarray"]:
+        """
+        Return (cached value or None, query vector). Pass the vector back to
+        add() on a miss so the text is only embedded once.
+        """
+        vec = self.embed(text)
+        with self._lock:
+            rows = [i for i, s in enumerate(self._scopes) if s == scope]
+            if self._vectors is None or not rows:
+                return None, vec
+            scores = self._vectors[rows] @ vec
+            best = int(scores.argmax())
+            if float(scores[best]) < self.threshold:
+                return None, vec
+            return copy.deepcopy(self._values[rows[best]]), vec
+
+    def add(self, vec: "np.ndarray", value: Any, scope: str = "") -> None:
+        import numpy as np
+
+        value = copy.deepcopy(value)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = vec.reshape(1, -1)
+            else:
+                if len(self._values) >= self.max_entries:
+                    self._vectors = self._vectors[1:]
+                    self._values.pop(0)
+                    self._scopes.pop(0)
+                self._vectors = np.vstack([self._vectors, vec])
+            self._values.append(value)
+            self._scopes.append(scope)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vectors = None
+            self._values = []
+            self._scopes = []
+
+
+class SingleFlight:
+    """
+    Collapse concurrent identical calls into one.
+
+    While a call for `key` is running, other threads asking for the same key
+    wait for it and receive a deep copy of its result (or its exception)
+    instead of starting a duplicate. The cache covers repeats after the first
+    call finishes; this covers the burst before it does.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, "Future[Any]"] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            return copy.deepcopy(future.result())
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight for coroutines. Calls are shared per event loop, since a
+    task can only be awaited from the loop that runs it.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: Dict[Tuple[int, str], "asyncio.Task[Any]"] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        slot = (id(asyncio.get_running_loop()), key)
+        task = self._tasks.get(slot)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[slot] = task
+            task.add_done_callback(lambda _: self._tasks.pop(slot, None))
+
+        # shield: cancelling any caller, the first one included, must not
+        # cancel the call the others are waiting on
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result)
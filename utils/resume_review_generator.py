@@ -1,7 +1,128 @@
-import json
-from typing import Dict, Optional
+import asyncio
+import logging
+import re
+from itertools import islice
+from typing import Any, Dict, Final, List, Literal, Optional, Tuple
 
-from openai import OpenAI
+import orjson
+
+from utils.batch_api import BATCH_API_POLL_SECONDS, batch_message_content, submit_chat_batch, wait_for_chat_batch
+from utils.openai_client import api_key_configured, circuit_breaker, get_async_client, get_client
+from utils.response_cache import AsyncSingleFlight, ResponseCache, SingleFlight, make_cache_key
+from utils.structured_output import delta_bytes, json_schema_format, strict_object, usage_summary
+from utils.text_budget import clip_to_tokens, compact_job_description, compact_whitespace
+
+logger = logging.getLogger(__name__)
+
+# Input budgets in tokens (the old 9000-char slices were ~2250 tokens each).
+# The whole resume is reviewed, so it is clipped rather than section-selected.
+RESUME_TOKEN_BUDGET = 3000
+JD_TOKEN_BUDGET = 2500
+
+# Output cap: a full review (four sections, rewrites, keywords) runs
+# ~1.5-2.5k tokens, so this leaves headroom while bounding a runaway
+# generation. Hitting it fails the review into the offline report.
+RESUME_MAX_COMPLETION_TOKENS = 4000
+
+# Every review is streamed, even when the caller wants the whole report:
+# the client's read timeout then applies between chunks rather than to the
+# full generation, which for a long review can outlast it. The final chunk
+# carries token usage.
+_STREAM_KWARGS: Final = {"stream": True, "stream_options": {"include_usage": True}}
+
+# quality="draft" reviews with this smaller, faster model
+DRAFT_MODEL = "gpt-4.1-nano"
+
+# In-flight cap for generate_resume_reports_bulk
+DEFAULT_RESUME_CONCURRENCY = 8
+
+# Below this many words there is no resume to review: skip the model, which
+# would only invent content, and return the offline review with a note.
+# Only words with letters count, so PDF debris (bullets, page numbers,
+# dates) can't carry an empty extraction past the gate.
+MIN_RESUME_WORDS = 50
+_RESUME_WORD_RE = re.compile(r"[^\W\d_]{2,}")
+
+# Static, so every call shares the same prefix for OpenAI prompt caching.
+# Never interpolate request data into it; that goes in the user message.
+_SYSTEM_PROMPT: Final = """
+You are NextStep.AI, an elite resume coach and ATS optimization expert. Review the resume text.
+If a job description is given, it is the source of truth: infer what the company screens for,
+extract its keywords, tools, responsibilities and must-have skills, and compare them to the resume.
+
+Rules:
+- Talk directly to the candidate; be specific and reference the resume and job description.
+- Never suggest skills the candidate lacks; phrase additions as honest reframes.
+- At least 3 bullet rewrites when the resume has enough content.
+- missing_keywords come from the job description when one is given; keywords.target_role echoes
+  the given role or infers one.
+- missing_information: metrics, scope, tools and outcomes the bullets should add.
+- scannability_score: integer 1-10.
+""".strip()
+
+
+_STR = {"type": "string"}
+_STR_LIST = {"type": "array", "items": _STR}
+_SECTION = strict_object({"strengths": _STR_LIST, "issues": _STR_LIST, "recommendations": _STR_LIST})
+
+# Report shape, enforced by the API so the prompt does not spell it out
+RESUME_RESPONSE_FORMAT = json_schema_format(
+    "resume_report",
+    strict_object(
+        {
+            "summary": _STR,
+            "sections": strict_object(
+                {
+                    "overall_structure": _SECTION,
+                    "experience": _SECTION,
+                    "education": _SECTION,
+                    "skills": _SECTION,
+                }
+            ),
+            "experience_bullets": strict_object(
+                {
+                    "rewrites": {
+                        "type": "array",
+                        "items": strict_object({"original": _STR, "improved": _STR, "why_it_is_better": _STR}),
+                    },
+                    "title_suggestions": {
+                        "type": "array",
+                        "items": strict_object({"original_title": _STR, "suggested_title": _STR, "reason": _STR}),
+                    },
+                    "missing_information": _STR_LIST,
+                }
+            ),
+            "structure": strict_object(
+                {
+                    "ordering": _STR_LIST,
+                    "sections_to_add_or_remove": strict_object({"add": _STR_LIST, "remove": _STR_LIST}),
+                }
+            ),
+            "spacing_readability": strict_object({"scannability_score": {"type": "integer"}, "tips": _STR_LIST}),
+            "keywords": strict_object(
+                {
+                    "target_role": _STR,
+                    "missing_keywords": _STR_LIST,
+                    "present_keywords_to_keep": _STR_LIST,
+                    "how_to_add_them": _STR_LIST,
+                }
+            ),
+        }
+    ),
+)
+
+_SYSTEM_PROMPT_DIGEST = make_cache_key(_SYSTEM_PROMPT)
+
+# Resubmitting the same resume (reloads, "try again", a second role check
+# with the same inputs) reuses the finished review. The key covers model,
+# prompt digest and the full user message, like the prep report cache.
+# Entries expire so prompt or model-side improvements reach repeat users.
+RESUME_CACHE_TTL_SECONDS = 3600
+_RESPONSE_CACHE = ResponseCache(maxsize=512, ttl_seconds=RESUME_CACHE_TTL_SECONDS)
+
+# Identical reviews that arrive while the first is still running wait for it
+_FLIGHTS = SingleFlight()
+_AFLIGHTS = AsyncSingleFlight()
 
 
 def generate_resume_report(
@@ -10,6 +131,8 @@ def generate_resume_report(
     job_description: Optional[str] = None,
     model: str = "gpt-4.1-mini",
     use_gpt: bool = True,
+    use_cache: bool = True,
+    quality: Literal["draft", "final"] = "final",
 ) -> Dict:
     """
     Generate a structured resume review report.
@@ -20,157 +143,264 @@ def generate_resume_report(
       - propose missing keywords and concrete ways to add them
 
     Returns a dict with the structure expected by the resume_check template.
+    use_cache=False always calls the model (e.g. an explicit "regenerate");
+    the fresh review still replaces the cached one. quality="draft" reviews
+    with DRAFT_MODEL instead of model, for a quicker, cheaper first pass.
+    """
+    kwargs, cache_key, early = _start_review(resume_text, target_role, job_description, model, use_gpt, use_cache, quality)
+    if early is not None:
+        return early
+
+    def _review() -> Dict:
+        try:
+            buf = bytearray()
+            for chunk in get_client().chat.completions.create(**kwargs, **_STREAM_KWARGS):
+                buf += _review_delta(chunk)
+            data = orjson.loads(buf or b"{}")
+        except Exception as e:
+            return _review_failed(resume_text, target_role, job_description, e)
+        return _finish_review_data(data, cache_key, resume_text, target_role, job_description)
+
+    return _FLIGHTS.do(cache_key, _review)
+
+
+async def agenerate_resume_report(
+    resume_text: str,
+    target_role: Optional[str] = None,
+    job_description: Optional[str] = None,
+    model: str = "gpt-4.1-mini",
+    use_gpt: bool = True,
+    use_cache: bool = True,
+    quality: Literal["draft", "final"] = "final",
+) -> Dict:
+    """
+    Async variant of generate_resume_report, using the shared AsyncOpenAI
+    client. Same inputs, output and caching.
+    """
+    kwargs, cache_key, early = _start_review(resume_text, target_role, job_description, model, use_gpt, use_cache, quality)
+    if early is not None:
+        return early
+
+    async def _review() -> Dict:
+        try:
+            buf = bytearray()
+            async for chunk in await get_async_client().chat.completions.create(**kwargs, **_STREAM_KWARGS):
+                buf += _review_delta(chunk)
+            data = orjson.loads(buf or b"{}")
+        except Exception as e:
+            return _review_failed(resume_text, target_role, job_description, e)
+        return _finish_review_data(data, cache_key, resume_text, target_role, job_description)
+
+    return await _AFLIGHTS.do(cache_key, _review)
+
+
+async def generate_resume_reports_bulk(
+    jobs: List[Dict[str, Any]],
+    max_concurrency: int = DEFAULT_RESUME_CONCURRENCY,
+) -> List[Dict]:
+    """
+    Review many resumes concurrently on one event loop, at most
+    max_concurrency in flight at a time, so the batch takes roughly as long
+    as its slowest review rather than the sum of all of them.
+
+    Each job is a dict of agenerate_resume_report keyword arguments. Results
+    are returned in the same order as jobs.
+    """
+    sem = asyncio.Semaphore(max_concurrency)
+
+    async def _one(job: Dict[str, Any]) -> Dict:
+        async with sem:
+            return await agenerate_resume_report(**job)
+
+    return list(await asyncio.gather(*(_one(job) for job in jobs)))
+
+
+def submit_resume_report_batch(jobs: List[Dict[str, Any]], model: str = "gpt-4.1-mini") -> str:
+    """
+    Queue resume reviews on the OpenAI Batch API (half price, separate rate
+    limits, results within 24h) and return the batch id.
+
+    For bulk runs where nobody waits on the page. Each job is a dict of
+    generate_resume_report keyword arguments (resume_text, target_role,
+    job_description); pass the same list to collect_resume_report_batch.
+    """
+    bodies = [
+        (
+            f"resume-{i}",
+            _completion_kwargs(job.get("resume_text") or "", job.get("target_role"), job.get("job_description"), model),
+        )
+        for i, job in enumerate(jobs)
+    ]
+    return submit_chat_batch(bodies, "resume_reports.jsonl") if bodies else ""
+
+
+def collect_resume_report_batch(
+    batch_id: str,
+    jobs: List[Dict[str, Any]],
+    poll_seconds: float = BATCH_API_POLL_SECONDS,
+) -> List[Dict]:
+    """
+    Wait for a batch from submit_resume_report_batch and return one report
+    per job, in order. Jobs whose request failed get the offline report.
+    """
+    status, results = wait_for_chat_batch(batch_id, poll_seconds) if batch_id else ("completed", {})
+
+    reports = []
+    for i, job in enumerate(jobs):
+        resume_text = job.get("resume_text") or ""
+        target_role = job.get("target_role")
+        job_description = job.get("job_description")
+        try:
+            content = batch_message_content(results.get(f"resume-{i}"), batch_id, status)
+            reports.append(_build_report(orjson.loads(content), target_role, job_description))
+        except Exception as e:
+            reports.append(_failed_report(resume_text, target_role, job_description, e))
+    return reports
+
+
+def _start_review(
+    resume_text: str,
+    target_role: Optional[str],
+    job_description: Optional[str],
+    model: str,
+    use_gpt: bool,
+    use_cache: bool = True,
+    quality: str = "final",
+) -> Tuple[Dict[str, Any], str, Optional[Dict]]:
+    """
+    Build the completion request. Returns (kwargs, cache_key, report), where
+    report is set when no call is needed (offline mode, no API key, too
+    little text, cache hit, breaker open).
     """
     if not use_gpt:
+        return {}, "", _local_fallback_resume_report(resume_text, target_role, job_description)
+
+    if not api_key_configured():
         report = _local_fallback_resume_report(resume_text, target_role, job_description)
-        return report
+        report["error"] = "AI review is not configured on this server (missing OPENAI_API_KEY)."
+        return {}, "", report
 
-    try:
-        client = OpenAI()
-
-        system_prompt = """
-You are NextStep.AI, an elite AI resume coach and ATS optimization expert.
-
-Your job:
-1) Read the resume text.
-2) If a job description is provided, treat it as the source of truth for alignment:
-   - infer what the company is screening for
-   - extract keywords, tools, responsibilities, and must-have skills
-   - compare them against the resume text
-   - propose missing keywords and the safest, most honest ways to add them (no lying)
-3) Produce premium, specific, actionable feedback.
-
-You MUST return a single JSON object with this exact shape:
-
-{
-  "summary": "High level review of how strong this resume is for the target role.",
-  "sections": {
-    "overall_structure": {
-      "strengths": ["...", "..."],
-      "issues": ["...", "..."],
-      "recommendations": ["...", "..."]
-    },
-    "experience": {
-      "strengths": ["...", "..."],
-      "issues": ["...", "..."],
-      "recommendations": ["...", "..."]
-    },
-    "education": {
-      "strengths": ["...", "..."],
-      "issues": ["...", "..."],
-      "recommendations": ["...", "..."]
-    },
-    "skills": {
-      "strengths": ["...", "..."],
-      "issues": ["...", "..."],
-      "recommendations": ["...", "..."]
-    }
-  },
-  "experience_bullets": {
-    "rewrites": [
-      {
-        "original": "Original bullet from the resume",
-        "improved": "Stronger, impact focused version",
-        "why_it_is_better": "Short explanation of the changes"
-      }
-    ],
-    "title_suggestions": [
-      {
-        "original_title": "Old job title",
-        "suggested_title": "Better aligned job title",
-        "reason": "Why this is a better wording"
-      }
-    ],
-    "missing_information": [
-      "Concrete, specific things that should be added to bullets (metrics, scope, tools, outcomes)."
-    ]
-  },
-  "structure": {
-    "ordering": [
-      "Clear guidance on which sections should come first for this candidate.",
-      "For example: Experience, Projects, Skills, Education."
-    ],
-    "sections_to_add_or_remove": {
-      "add": [
-        "Sections or subsections that would help (Projects, Summary, Skills, Certifications)."
-      ],
-      "remove": [
-        "Sections or items that do not add value or feel redundant."
-      ]
-    }
-  },
-  "spacing_readability": {
-    "scannability_score": 1 to 10 integer,
-    "tips": [
-      "Short, specific tips to make it easier to skim.",
-      "For example: more white space, strong section headings, consistent bullet structure."
-    ]
-  },
-  "keywords": {
-    "target_role": "Target role string (echo the one provided or infer a likely one).",
-    "missing_keywords": [
-      "Important domain or technical keywords that are not present but should be."
-    ],
-    "present_keywords_to_keep": [
-      "Keywords already present that are very relevant to the target role."
-    ],
-    "how_to_add_them": [
-      "Concrete rewrite suggestions showing how to naturally inject missing keywords."
-    ]
-  }
-}
-
-RULES:
-- Always return valid JSON only. No markdown. No extra commentary.
-- Talk directly to the candidate.
-- Be specific. Reference the resume text and the job description (if provided).
-- Never suggest adding skills the candidate does not have. Phrase additions as honest reframes.
-- Always produce at least 3 bullet rewrites if there is enough resume content.
-- Missing keywords should be drawn from the job description when it exists.
-"""
-
-        trimmed_resume = (resume_text or "")[:9000]
-        trimmed_jd = (job_description or "")[:9000]
-
-        user_message = (
-            "Create a resume feedback report in the required JSON format.\n\n"
-            f"Target role (may be empty): {target_role or ''}\n\n"
-            "Job description (may be empty):\n"
-            f"{trimmed_jd}\n\n"
-            "Resume text:\n"
-            f"{trimmed_resume}\n"
-        )
+    if not _has_min_words(resume_text or "", MIN_RESUME_WORDS):
+        report = _local_fallback_resume_report(resume_text, target_role, job_description)
+        report["error"] = "Not enough resume text to review; paste or upload your full resume and try again."
+        return {}, "", report
 
-        response = client.chat.completions.create(
-            model=model,
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": system_prompt.strip()},
-                {"role": "user", "content": user_message},
-            ],
+    if quality == "draft":
+        model = DRAFT_MODEL
+    kwargs = _completion_kwargs(resume_text, target_role, job_description, model)
+    cache_key = make_cache_key(model, _SYSTEM_PROMPT_DIGEST, kwargs["messages"][1]["content"])
+    cached = _RESPONSE_CACHE.get(cache_key) if use_cache else None
+    if cached is not None:
+        return kwargs, cache_key, cached
+
+    # Retryable errors were already retried with backoff by the client; while
+    # OpenAI is down, answer from the local template without queueing on it
+    if not circuit_breaker.allow():
+        return kwargs, cache_key, _failed_report(
+            resume_text, target_role, job_description, RuntimeError("OpenAI is unavailable, skipping the call for now")
         )
+    return kwargs, cache_key, None
+
+
+def _has_min_words(text: str, min_words: int) -> bool:
+    # Stops scanning at min_words, so a full resume costs a few microseconds
+    return sum(1 for _ in islice(_RESUME_WORD_RE.finditer(text), min_words)) >= min_words
 
-        content = response.choices[0].message.content
-        data = json.loads(content)
-
-        report = {
-            "target_role": data.get("keywords", {}).get("target_role") or target_role,
-            "summary": data.get("summary"),
-            "sections": data.get("sections", {}),
-            "experience_bullets": data.get("experience_bullets", {}),
-            "structure": data.get("structure", {}),
-            "spacing_readability": data.get("spacing_readability", {}),
-            "keywords": data.get("keywords", {}),
-            "used_job_description": bool((job_description or "").strip()),
-        }
-        return report
 
+def _review_delta(chunk: Any) -> bytes:
+    _log_usage(chunk)
+    return delta_bytes(chunk, "review the resume")
+
+
+def _finish_review_data(
+    data: Dict[str, Any],
+    cache_key: str,
+    resume_text: str,
+    target_role: Optional[str],
+    job_description: Optional[str],
+) -> Dict:
+    try:
+        report = _build_report(data, target_role, job_description)
     except Exception as e:
-        fallback = _local_fallback_resume_report(resume_text, target_role, job_description)
-        fallback["error"] = f"GPT generation failed: {str(e)}"
-        return fallback
+        return _review_failed(resume_text, target_role, job_description, e)
+
+    circuit_breaker.success()
+    _RESPONSE_CACHE.set(cache_key, report)
+    return report
+
+
+def _review_failed(
+    resume_text: str,
+    target_role: Optional[str],
+    job_description: Optional[str],
+    e: Exception,
+) -> Dict:
+    circuit_breaker.failure(e)
+    logger.warning("Resume report generation failed, using the offline report: %s", e)
+    return _failed_report(resume_text, target_role, job_description, e)
+
+
+def _completion_kwargs(
+    resume_text: str,
+    target_role: Optional[str],
+    job_description: Optional[str],
+    model: str,
+) -> Dict[str, Any]:
+    trimmed_resume = clip_to_tokens(compact_whitespace(resume_text), RESUME_TOKEN_BUDGET)
+    trimmed_jd = clip_to_tokens(compact_job_description(job_description), JD_TOKEN_BUDGET)
+
+    # Resume first: reviewing the same resume for another role or posting
+    # then shares the whole system + resume prefix, which OpenAI bills at the
+    # cached rate. prompt_cache_key routes those requests to the same cache.
+    user_message = (
+        "Resume text:\n"
+        f"{trimmed_resume}\n\n"
+        "Job description (may be empty):\n"
+        f"{trimmed_jd}\n\n"
+        f"Target role (may be empty): {target_role or ''}\n\n"
+        "Create a resume feedback report.\n"
+    )
+
+    return {
+        "model": model,
+        "response_format": RESUME_RESPONSE_FORMAT,
+        "max_completion_tokens": RESUME_MAX_COMPLETION_TOKENS,
+        "messages": [
+            {"role": "system", "content": _SYSTEM_PROMPT},
+            {"role": "user", "content": user_message},
+        ],
+        "prompt_cache_key": "resume-" + make_cache_key(_SYSTEM_PROMPT_DIGEST, trimmed_resume)[:32],
+    }
+
+
+def _log_usage(response: Any) -> None:
+    usage = usage_summary(getattr(response, "usage", None))
+    if usage is not None:
+        logger.debug("Resume report usage: %s", usage)
+
+
+def _build_report(data: Dict, target_role: Optional[str], job_description: Optional[str]) -> Dict:
+    # The strict schema guarantees every key, so no defaults are needed
+    return {
+        **data,
+        "target_role": data["keywords"]["target_role"] or target_role,
+        "used_job_description": bool((job_description or "").strip()),
+    }
+
+
+def _failed_report(
+    resume_text: str,
+    target_role: Optional[str],
+    job_description: Optional[str],
+    e: Exception,
+) -> Dict:
+    fallback = _local_fallback_resume_report(resume_text, target_role, job_description)
+    fallback["error"] = f"GPT generation failed: {str(e)}"
+    return fallback
 
 
+# Built fresh from literals on purpose: CPython constructs this (~2us) faster
+# than it can deep-copy a shared template (~40us) or parse cached JSON (~4us)
 def _local_fallback_resume_report(
     resume_text: str,
     target_role: Optional[str],
@@ -0,0 +1,94 @@
+"""
+Incremental parsing for JSON objects that arrive in streamed chunks.
+
+A report is one large JSON object whose top-level members (sections) finish
+one after another. Scanning the bytes as they arrive lets callers use each
+section as soon as its closing bracket streams in, instead of waiting for
+the whole object.
+"""
+from typing import Any, Dict, List, Tuple
+
+import orjson
+
+_QUOTE = 0x22  # "
+_BACKSLASH = 0x5C  # \
+_COMMA = 0x2C  # ,
+_OPENERS = (0x7B, 0x5B)  # { [
+_CLOSERS = (0x7D, 0x5D)  # } ]
+
+
+class JsonMemberScanner:
+    """
+    Feed raw chunks of a JSON object; get back each top-level (key, value)
+    member once it is complete.
+
+    Only tracks string/escape state and nesting depth, so every byte is
+    looked at once. Multi-byte UTF-8 sequences never contain ASCII bytes,
+    so they cannot be mistaken for structure.
+
+    Bytes of members already parsed are dropped, so the buffer only ever
+    holds the member still streaming, and result() returns the members
+    parsed along the way instead of decoding the whole object again.
+    """
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._member_start = -1
+        self._closed = False
+        self._members: Dict[str, Any] = {}
+
+    def result(self) -> Dict[str, Any]:
+        """
+        The complete object. Raises ValueError if it has not closed yet
+        (e.g. the stream was cut off).
+        """
+        if not self._closed:
+            raise ValueError("Streamed JSON object is incomplete")
+        return self._members
+
+    def feed(self, data: bytes) -> List[Tuple[str, Any]]:
+        self._buf += data
+        buf = self._buf
+        members: List[Tuple[str, Any]] = []
+
+        for i in range(self._pos, len(buf)):
+            c = buf[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif c == _BACKSLASH:
+                    self._escaped = True
+                elif c == _QUOTE:
+                    self._in_string = False
+            elif c == _QUOTE:
+                self._in_string = True
+            elif c in _OPENERS:
+                self._depth += 1
+                if self._depth == 1:
+                    self._member_start = i + 1
+            elif c in _CLOSERS:
+                if self._depth == 1:
+                    self._emit(i, members)
+                    self._closed = True
+                self._depth -= 1
+            elif c == _COMMA and self._depth == 1:
+                self._emit(i, members)
+                self._member_start = i + 1
+
+        # Keep only the member in progress
+        consumed = self._member_start if self._depth > 0 else len(buf)
+        del buf[:consumed]
+        self._member_start -= consumed
+        self._pos = len(buf)
+        return members
+
+    def _emit(self, end: int, members: List[Tuple[str, Any]]) -> None:
+        member = bytes(self._buf[self._member_start : end]).strip()
+        if member:
+            parsed = orjson.loads(b"{" + member + b"}").items()
+            self._members.update(parsed)
+            members.extend(parsed)
@@ -0,0 +1,83 @@
+"""
+Structured Outputs helpers shared by the report generators and evaluation.
+
+Every JSON call here follows the same steps: declare a strict schema,
+reject refusals, parse the content with orjson and log token usage. Keeping
+those steps in one place means a change to any of them lands everywhere.
+"""
+from typing import Any, Dict, Optional
+
+import orjson
+
+
+def strict_object(properties: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    JSON schema object for strict mode: every property required, nothing extra.
+    """
+    return {
+        "type": "object",
+        "additionalProperties": False,
+        "required": list(properties),
+        "properties": properties,
+    }
+
+
+def json_schema_format(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    response_format that makes the API enforce schema at decode time.
+    """
+    return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+
+
+def parse_message(message: Any, what: str) -> Dict[str, Any]:
+    """
+    Parse a non-streamed assistant message produced under a json_schema
+    response_format. Raises ValueError if the model refused, naming `what`
+    (e.g. "review the resume") in the error.
+    """
+    if getattr(message, "refusal", None):
+        raise ValueError(f"Model refused to {what}: {message.refusal}")
+    return orjson.loads(message.content or b"{}")
+
+
+def check_finish_reason(finish_reason: Optional[str], what: str) -> None:
+    """
+    Raise ValueError when a completion stopped before its JSON was complete:
+    it hit the token cap, or the content filter cut it off.
+    """
+    if finish_reason == "length":
+        raise ValueError(f"Hit the completion token limit before finishing ({what})")
+    if finish_reason == "content_filter":
+        raise ValueError(f"Output was stopped by the content filter ({what})")
+
+
+def delta_bytes(chunk: Any, what: str) -> bytes:
+    """
+    Content of one streamed chunk as UTF-8 bytes. Raises ValueError on a
+    refusal or when the completion stopped early (see check_finish_reason),
+    naming `what` in the error.
+    """
+    if not chunk.choices:
+        return b""
+    choice = chunk.choices[0]
+    check_finish_reason(choice.finish_reason, what)
+    delta = choice.delta
+    if delta.refusal:
+        raise ValueError(f"Model refused to {what}: {delta.refusal}")
+    return delta.content.encode("utf-8") if delta.content else b""
+
+
+def usage_summary(usage: Any) -> Optional[Dict[str, int]]:
+    """
+    Token counts of a completion (or final stream chunk) as a plain dict, or
+    None when the response carries no usage. cached_tokens shows whether the
+    static prompt prefix hit OpenAI's prompt cache.
+    """
+    if usage is None:
+        return None
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "cached_tokens": (getattr(details, "cached_tokens", None) or 0) if details else 0,
+        "completion_tokens": usage.completion_tokens,
+    }
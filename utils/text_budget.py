@@ -0,0 +1,192 @@
+"""
+Token-aware trimming for prompt inputs.
+
+Character slices over- or under-shoot the real input size depending on
+the text; clipping by tokens keeps each input inside a predictable share
+of the context window and of the per-call input cost.
+"""
+import logging
+import re
+import threading
+from typing import Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Tokenizer used by the gpt-4o / gpt-4.1 model families
+ENCODING_NAME = "o200k_base"
+
+# Rough ratio for English prose, used when the tokenizer is unavailable
+CHARS_PER_TOKEN = 4
+
+# Built lazily: importing tiktoken and loading the BPE ranks is slow, and
+# the first load may need to download the ranks file.
+_encoder: Optional[Any] = None
+_encoder_failed = False
+_encoder_lock = threading.Lock()
+
+
+def _get_encoder() -> Optional[Any]:
+    global _encoder, _encoder_failed
+    if _encoder is None and not _encoder_failed:
+        with _encoder_lock:
+            if _encoder is None and not _encoder_failed:
+                try:
+                    import tiktoken
+
+                    _encoder = tiktoken.get_encoding(ENCODING_NAME)
+                except Exception:
+                    # Don't retry on every call; fall back to character budgets
+                    logger.warning("tiktoken unavailable, clipping by characters instead", exc_info=True)
+                    _encoder_failed = True
+    return _encoder
+
+
+def count_tokens(text: Optional[str]) -> int:
+    text = text or ""
+    enc = _get_encoder()
+    if enc is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def _surely_fits(text: str, max_tokens: int) -> bool:
+    """
+    Cheap check that text is at most max_tokens tokens, without encoding it.
+    Byte-level BPE tokens are at least one UTF-8 byte each, so text with no
+    more bytes than max_tokens always fits. False means "count to find out".
+    """
+    if len(text) > max_tokens:
+        return False
+    # str.isascii() is O(1) in CPython; for ASCII, bytes == characters
+    return text.isascii() or len(text.encode("utf-8")) <= max_tokens
+
+
+def clip_to_tokens(text: Optional[str], max_tokens: int) -> str:
+    """
+    Return the longest prefix of text that fits in max_tokens tokens.
+    """
+    text = text or ""
+    if _surely_fits(text, max_tokens):
+        # Returned as is: no encode/decode round trip (or tokenizer load)
+        return text
+    enc = _get_encoder()
+    if enc is None:
+        return text[: max_tokens * CHARS_PER_TOKEN]
+
+    tokens = enc.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return enc.decode(tokens[:max_tokens])
+
+
+# Runs of spaces/tabs (PDF extraction and pasted postings are full of them)
+_HSPACE_RE = re.compile(r"[ \t\u00a0]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+# Legal/HR boilerplate lines in job postings; no signal for interview prep
+_JD_BOILERPLATE_RE = re.compile(
+    r"equal (?:employment )?opportunity|reasonable accommodation|without regard to|protected veteran"
+    r"|e-verify|background check|applicant privacy|privacy (?:notice|policy)|pay transparency",
+    re.IGNORECASE,
+)
+_BULLET_CHARS = "-*•·–— "
+
+
+def compact_whitespace(text: Optional[str]) -> str:
+    """
+    Collapse runs of spaces and blank lines; line structure (and so section
+    headings) is kept and words are untouched, so quotes stay exact.
+    """
+    lines = (_HSPACE_RE.sub(" ", line).strip() for line in (text or "").splitlines())
+    return _BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+
+
+def compact_job_description(text: Optional[str]) -> str:
+    """
+    compact_whitespace, plus dropping repeated bullets and legal boilerplate
+    (EEO, accommodation, privacy notices), so the token budget goes to the
+    role itself.
+    """
+    seen = set()
+    kept: List[str] = []
+    for line in compact_whitespace(text).split("\n"):
+        if line:
+            key = line.lstrip(_BULLET_CHARS).lower()
+            if key in seen or _JD_BOILERPLATE_RE.search(line):
+                continue
+            seen.add(key)
+        kept.append(line)
+    return _BLANK_LINES_RE.sub("\n\n", "\n".join(kept)).strip()
+
+
+# A line that is just a resume section heading, e.g. "WORK EXPERIENCE" or "Projects:"
+_SECTION_HEADING_RE = re.compile(
+    r"^[ \t]*(?P<name>professional experience|work experience|experience|work history|employment"
+    r"|projects|technical skills|skills|education|certifications|summary|profile"
+    r"|awards|publications|leadership|activities|volunteer\w*|languages|interests|hobbies|references)"
+    r"\b[ \t:]*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+_WORD_RE = re.compile(r"[a-z0-9+#]+")
+
+# Section priority when the resume is over budget: lower is kept first
+_SECTION_PRIORITY = {
+    "experience": 0, "professional experience": 0, "work experience": 0, "work history": 0, "employment": 0,
+    "projects": 1, "skills": 1, "technical skills": 1,
+    "summary": 2, "profile": 2, "education": 2, "certifications": 2,
+    "interests": 4, "hobbies": 4, "references": 4,
+}
+_DEFAULT_SECTION_PRIORITY = 3
+
+
+def select_resume_sections(resume_text: Optional[str], job_title: str, max_tokens: int) -> str:
+    """
+    Fit a resume into max_tokens by keeping whole sections, most useful first.
+
+    Resumes that already fit are returned unchanged. Otherwise the text is
+    split on section headings; the header (name, contact, summary) is always
+    kept, then experience, projects and skills, then sections mentioning the
+    job title's words, and hobby-type sections last. Kept sections stay in
+    their original order so quotes from the resume remain exact.
+    """
+    resume_text = resume_text or ""
+    if _surely_fits(resume_text, max_tokens) or count_tokens(resume_text) <= max_tokens:
+        return resume_text
+
+    sections = _split_sections(resume_text)
+    if len(sections) <= 1:
+        return clip_to_tokens(resume_text, max_tokens)
+
+    title_words = set(_WORD_RE.findall((job_title or "").lower()))
+
+    def rank(item: Tuple[int, Tuple[str, str]]) -> Tuple[int, int, int]:
+        pos, (name, body) = item
+        if pos == 0:
+            return (-1, 0, 0)
+        overlap = len(title_words & set(_WORD_RE.findall(body.lower())))
+        return (_SECTION_PRIORITY.get(name, _DEFAULT_SECTION_PRIORITY), -overlap, pos)
+
+    kept: List[Tuple[int, str]] = []
+    remaining = max_tokens
+    for pos, (_, body) in sorted(enumerate(sections), key=rank):
+        cost = count_tokens(body)
+        if cost <= remaining:
+            kept.append((pos, body))
+            remaining -= cost
+        elif remaining > 0:
+            # Partially keep the next most useful section, then stop
+            kept.append((pos, clip_to_tokens(body, remaining)))
+            break
+
+    return "".join(body for _, body in sorted(kept))
+
+
+def _split_sections(text: str) -> List[Tuple[str, str]]:
+    # [(heading name, text including the heading line)], header first
+    sections: List[Tuple[str, str]] = []
+    start, name = 0, ""
+    for m in _SECTION_HEADING_RE.finditer(text):
+        sections.append((name, text[start : m.start()]))
+        start, name = m.start(), m.group("name").lower()
+    sections.append((name, text[start:]))
+    return sections